@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# 图形界面启动耗时检查：在全新的子进程中计时 导入 sprite_sheet_gui 与 创建并显示主窗口，
+# 同时确认启动阶段没有导入 Pillow、NumPy 与图像处理模块 (它们应在首次合并时才加载)。
+# 启动耗时 (不含解释器自身启动) 的中位数超过目标值或导入了重模块时返回非零退出码，可用于构建检查。
+# 没有图形显示环境时只测量导入耗时。
+#
+# 用法示例:
+#   python benchmarks/bench_startup.py
+#   python benchmarks/bench_startup.py --repeat 10 --target-ms 200 -o startup.json
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import statistics
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 启动目标：导入界面模块并显示主窗口的耗时中位数 (毫秒)
+STARTUP_TARGET_MS = 150
+# 启动阶段不应导入的模块
+HEAVY_MODULES = ("PIL", "numpy", "sprite_sheet_core", "sprite_sheet_cache", "sprite_sheet_scan")
+
+# 在子进程中执行：计时导入与窗口创建，结果以一行 JSON 输出
+_PROBE = r"""
+import sys, time, json
+start = time.perf_counter()
+import sprite_sheet_gui
+import_ms = (time.perf_counter() - start) * 1000
+window_ms = None
+try:
+    root = sprite_sheet_gui.tk.Tk()
+except Exception:
+    root = None
+if root is not None:
+    sprite_sheet_gui.SpriteSheetApp(root)
+    root.update()
+    window_ms = (time.perf_counter() - start) * 1000 - import_ms
+    root.destroy()
+print(json.dumps({"import_ms": import_ms, "window_ms": window_ms,
+                  "heavy_modules": [m for m in HEAVY_MODULES if m in sys.modules]}))
+"""
+
+
+def run_probe():
+    code = f"HEAVY_MODULES = {HEAVY_MODULES!r}\n" + _PROBE
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True)
+    process_ms = (time.perf_counter() - start) * 1000
+    if completed.returncode != 0:
+        raise RuntimeError(f"启动子进程失败:\n{completed.stderr}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["process_ms"] = process_ms
+    result["startup_ms"] = result["import_ms"] + (result["window_ms"] or 0)
+    return result
+
+
+def environment_info():
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "display": bool(os.environ.get("DISPLAY")) or sys.platform in ("win32", "darwin"),
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="bench_startup", description="图形界面启动耗时检查")
+    parser.add_argument("-o", "--output", help="JSON 结果文件 (默认只输出摘要)")
+    parser.add_argument("--repeat", type=int, default=5, help="启动次数，取中位数 (默认 5)")
+    parser.add_argument("--target-ms", type=float, default=STARTUP_TARGET_MS,
+                        help=f"启动耗时目标 (毫秒，默认 {STARTUP_TARGET_MS})")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.repeat <= 0:
+        print("错误：--repeat 必须是正整数。", file=sys.stderr)
+        return 2
+    runs = [run_probe() for _ in range(args.repeat)]
+    median_ms = statistics.median(run["startup_ms"] for run in runs)
+    heavy = sorted({m for run in runs for m in run["heavy_modules"]})
+    passed = median_ms <= args.target_ms and not heavy
+    report = {"environment": environment_info(), "target_ms": args.target_ms,
+              "median_startup_ms": round(median_ms, 1), "first_startup_ms": round(runs[0]["startup_ms"], 1),
+              "heavy_modules": heavy, "passed": passed, "runs": runs}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+
+    has_window = runs[0]["window_ms"] is not None
+    print(f"启动耗时中位数 {median_ms:.0f} ms ({'导入 + 显示窗口' if has_window else '仅导入，无图形显示环境'})，"
+          f"首次 {runs[0]['startup_ms']:.0f} ms，含解释器启动 {statistics.median(r['process_ms'] for r in runs):.0f} ms，"
+          f"目标 {args.target_ms:.0f} ms", file=sys.stderr)
+    if heavy:
+        print(f"错误：启动时导入了 {', '.join(heavy)}，应推迟到首次合并时导入。", file=sys.stderr)
+    print("通过" if passed else "未通过", file=sys.stderr)
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
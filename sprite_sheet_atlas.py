@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+# 图集打包模式：裁掉每帧透明边框，用 Skyline (bottom-left) 算法把裁剪后的矩形
+# 紧密排进一张 2 的幂或限定尺寸的图集，并输出记录帧位置与偏移的元数据文件
+import os
+import json
+import xml.etree.ElementTree as ET
+
+from sprite_sheet_encode import save_image
+from sprite_sheet_progress import RunMetrics
+from sprite_sheet_core import (Image, frame_digest, _frame_bytes, _iter_loaded_frames, _ensure_output_dir,
+                               _remove_cells_file, _write_core_error_log)
+
+ATLAS_METADATA_FORMATS = ('json', 'xml')
+
+
+# --- 裁剪透明边框 ---
+# 返回 (裁剪后的图像, (x, y, w, h))，坐标相对于原帧；全透明帧保留为 1x1
+def trim_frame(img):
+    if img.mode != 'RGBA':
+        img = img.convert('RGBA')
+    bbox = img.getchannel('A').getbbox()
+    if bbox is None:
+        return img.crop((0, 0, 1, 1)), (0, 0, 1, 1)
+    if bbox == (0, 0) + img.size:
+        return img, (0, 0) + img.size
+    x0, y0, x1, y1 = bbox
+    return img.crop(bbox), (x0, y0, x1 - x0, y1 - y0)
+
+
+# --- Skyline 装箱 ---
+# 天际线用三个并行列表 (x, y, 宽度) 表示，按 x 递增且首尾相接
+class SkylinePacker:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self._xs = [0]
+        self._ys = [0]
+        self._ws = [width]
+
+    # 放入 w x h 的矩形，返回左上角坐标；放不下时返回 None
+    def insert(self, w, h):
+        xs, ys, ws = self._xs, self._ys, self._ws
+        width, height = self.width, self.height
+        node_count = len(xs)
+        best_index = -1
+        best_top = best_width = 0
+        best_y = 0
+        for i in range(node_count):
+            x = xs[i]
+            if x + w > width:
+                break
+            y = ys[i]
+            remaining = w
+            j = i
+            while remaining > 0:
+                if ys[j] > y:
+                    y = ys[j]
+                remaining -= ws[j]
+                j += 1
+            top = y + h
+            if top > height:
+                continue
+            if best_index < 0 or top < best_top or (top == best_top and ws[i] < best_width):
+                best_index, best_top, best_width, best_y = i, top, ws[i], y
+        if best_index < 0:
+            return None
+        x = xs[best_index]
+        self._add_level(best_index, x, best_top, w)
+        return x, best_y
+
+    def _add_level(self, index, x, top, w):
+        xs, ys, ws = self._xs, self._ys, self._ws
+        xs.insert(index, x)
+        ys.insert(index, top)
+        ws.insert(index, w)
+        # 收缩或删除被新节点覆盖的后续节点
+        right = x + w
+        i = index + 1
+        while i < len(xs):
+            if xs[i] >= right:
+                break
+            shrink = right - xs[i]
+            if ws[i] <= shrink:
+                del xs[i], ys[i], ws[i]
+                continue
+            xs[i] += shrink
+            ws[i] -= shrink
+            break
+        # 合并相同高度的相邻节点
+        if index + 1 < len(xs) and ys[index + 1] == top:
+            ws[index] += ws[index + 1]
+            del xs[index + 1], ys[index + 1], ws[index + 1]
+        if index > 0 and ys[index - 1] == top:
+            ws[index - 1] += ws[index]
+            del xs[index], ys[index], ws[index]
+
+
+def _next_power_of_two(value):
+    return 1 << max(0, (value - 1).bit_length())
+
+
+# --- 计算图集尺寸并装箱 ---
+# sizes 为 (w, h) 列表，矩形之间至少间隔 padding 像素。从面积估算的最小尺寸开始尝试，
+# 放不下时逐步增大，超过 max_size 时抛出 ValueError。返回 (图集宽, 图集高, 每个矩形的坐标)
+def pack_rects(sizes, max_size=4096, power_of_two=True, padding=0):
+    if not sizes:
+        raise ValueError("没有需要打包的帧")
+    max_w = max(w for w, _ in sizes)
+    max_h = max(h for _, h in sizes)
+    if max_w > max_size or max_h > max_size:
+        raise ValueError(f"单帧尺寸 {max_w}x{max_h} 超过图集上限 {max_size}")
+    area = sum((w + padding) * (h + padding) for w, h in sizes)
+    width = max(int(area ** 0.5), max_w + padding)
+    if power_of_two:
+        width = _next_power_of_two(width)
+    height = max(-(-area // width), max_h + padding)
+    if power_of_two:
+        height = _next_power_of_two(height)
+    # 高度优先排序，Skyline 在这种顺序下浪费最少
+    order = sorted(range(len(sizes)), key=lambda k: (-sizes[k][1], -sizes[k][0]))
+    while True:
+        width, height = min(width, max_size), min(height, max_size)
+        # 每个矩形向右下方扩展 padding，图集边缘的间距可以超出画布
+        packer = SkylinePacker(width + padding, height + padding)
+        positions = [None] * len(sizes)
+        for k in order:
+            w, h = sizes[k]
+            pos = packer.insert(w + padding, h + padding)
+            if pos is None:
+                break
+            positions[k] = pos
+        else:
+            return width, height, positions
+        if width >= max_size and height >= max_size:
+            raise ValueError(f"在 {max_size}x{max_size} 的图集上限内放不下全部 {len(sizes)} 帧")
+        # 先加宽、再加高，保持图集接近正方形
+        if power_of_two:
+            if width <= height and width < max_size:
+                width *= 2
+            else:
+                height *= 2
+        else:
+            if width <= height and width < max_size:
+                width = int(width * 1.1) + 1
+            else:
+                height = int(height * 1.1) + 1
+
+
+# --- 写出元数据 ---
+def _write_atlas_metadata(metadata_path, metadata_format, image_name, atlas_size, entries):
+    if metadata_format == 'xml':
+        root = ET.Element('TextureAtlas', imagePath=image_name,
+                          width=str(atlas_size[0]), height=str(atlas_size[1]))
+        for entry in entries:
+            x, y, w, h = entry['frame']
+            ox, oy, _, _ = entry['source_rect']
+            sw, sh = entry['source_size']
+            ET.SubElement(root, 'sprite', n=entry['filename'], x=str(x), y=str(y), w=str(w), h=str(h),
+                          oX=str(ox), oY=str(oy), oW=str(sw), oH=str(sh))
+        ET.ElementTree(root).write(metadata_path, encoding='utf-8', xml_declaration=True)
+        return
+    frames = []
+    for entry in entries:
+        x, y, w, h = entry['frame']
+        ox, oy, ow, oh = entry['source_rect']
+        sw, sh = entry['source_size']
+        frames.append({
+            "filename": entry['filename'],
+            "frame": {"x": x, "y": y, "w": w, "h": h},
+            "rotated": False,
+            "trimmed": (ox, oy, ow, oh) != (0, 0, sw, sh),
+            "spriteSourceSize": {"x": ox, "y": oy, "w": ow, "h": oh},
+            "sourceSize": {"w": sw, "h": sh},
+        })
+    with open(metadata_path, 'w', encoding='utf-8') as f:
+        json.dump({"frames": frames,
+                   "meta": {"image": image_name, "format": "RGBA8888",
+                            "size": {"w": atlas_size[0], "h": atlas_size[1]}, "scale": "1"}},
+                  f, ensure_ascii=False, indent=1)
+
+
+def atlas_metadata_path(output_path, metadata_format='json'):
+    return os.path.splitext(output_path)[0] + '.' + metadata_format
+
+
+# --- 核心逻辑函数 (图集打包) ---
+def create_atlas(input_dir, output_path, status_callback, sorted_image_files,
+                 max_size=4096, padding=1, power_of_two=True, trim=True,
+                 metadata_format='json', workers=1, pool_mode="thread", dedupe=False,
+                 encode_profile=None, quantize=False, metrics=None):
+    status_callback(f"开始打包图集: 上限={max_size}x{max_size}, 间距={padding}, 裁剪透明边={'是' if trim else '否'}")
+    if metrics is None:
+        metrics = RunMetrics()
+    try:
+        file_count = len(sorted_image_files)
+        if file_count == 0:
+            status_callback("错误：没有找到需要合并的图像文件。")
+            return False
+        if metadata_format not in ATLAS_METADATA_FORMATS:
+            status_callback(f"错误：不支持的元数据格式 '{metadata_format}'")
+            return False
+
+        # images 只保存需要打包的不重复图像；frames 记录每帧引用的图像序号与偏移
+        images = []
+        image_by_digest = {}
+        frames = []
+        trimmed_pixels = source_pixels = 0
+        metrics.begin("frames", file_count)
+        loaded = _iter_loaded_frames(input_dir, sorted_image_files, None, None, 'RGBA',
+                                     status_callback, workers, pool_mode)
+        for i, filename, img in loaded:
+            if img is None:
+                metrics.advance(i)
+                continue
+            metrics.advance(i, _frame_bytes(img))
+            source_size = img.size
+            if trim:
+                img, source_rect = trim_frame(img)
+            else:
+                source_rect = (0, 0) + source_size
+            source_pixels += source_size[0] * source_size[1]
+            image_index = None
+            if dedupe:
+                digest = frame_digest(img)
+                image_index = image_by_digest.get(digest)
+                if image_index is None:
+                    image_by_digest[digest] = len(images)
+            if image_index is None:
+                image_index = len(images)
+                images.append(img)
+                trimmed_pixels += img.size[0] * img.size[1]
+            frames.append((filename, image_index, source_rect, source_size))
+        if not frames:
+            status_callback("错误：没有可打包的帧。")
+            return False
+        if trim and source_pixels:
+            status_callback(f"裁剪透明边框后像素数减少 {100 - trimmed_pixels * 100 // source_pixels}%。")
+        if dedupe:
+            status_callback(f"去重：{len(frames)} 帧中有 {len(images)} 个不同的图像。")
+
+        metrics.begin("pack", len(images))
+        sizes = [img.size for img in images]
+        try:
+            atlas_width, atlas_height, positions = pack_rects(sizes, max_size, power_of_two, padding)
+        except ValueError as pack_e:
+            status_callback(f"错误：图集打包失败: {pack_e}")
+            return False
+        status_callback(f"已打包 {len(images)} 个图像到 {atlas_width}x{atlas_height} 的图集。")
+
+        atlas = Image.new('RGBA', (atlas_width, atlas_height))
+        for img, position in zip(images, positions):
+            atlas.paste(img, position)
+        entries = []
+        for filename, image_index, source_rect, source_size in frames:
+            entries.append({"filename": filename, "frame": positions[image_index] + images[image_index].size,
+                            "source_rect": source_rect, "source_size": source_size})
+
+        _ensure_output_dir(output_path, status_callback)
+        _remove_cells_file(output_path)
+        metrics.begin("save")
+        _, byte_count = save_image(atlas, output_path, status_callback, encode_profile, quantize)
+        metrics.add_bytes(byte_count)
+        metrics.end()
+        metadata_path = atlas_metadata_path(output_path, metadata_format)
+        _write_atlas_metadata(metadata_path, metadata_format, os.path.basename(output_path),
+                              (atlas_width, atlas_height), entries)
+        status_callback(f"成功！图集已保存至: {output_path}，元数据: {metadata_path}")
+        return True
+
+    except Exception as e:
+        status_callback(f"打包图集时发生未预料的错误: {e}")
+        _write_core_error_log("create_atlas", status_callback)
+        return False
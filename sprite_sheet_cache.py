@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+# 已规范化帧 (缩放到单帧尺寸并转换模式后) 的磁盘缓存，用于增量重建序列图
+#
+# 缓存条目的键由源文件内容哈希与规范化参数组成；源文件的 (路径, mtime, 大小)
+# 到内容哈希的映射保存在 index.json 中，未改动的文件无需重新读取即可得到键。
+# 条目文件的 mtime 作为最近使用时间，超过容量上限时按 LRU 删除；
+# 索引只保留仍有缓存条目的内容哈希，写入前与磁盘上的索引合并，多个进程同时使用同一缓存目录时不会互相覆盖。
+import os
+import json
+import zlib
+import hashlib
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "sprite_sheet")
+DEFAULT_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _hash_file(path):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FrameCache:
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.frames_dir = os.path.join(self.cache_dir, "frames")
+        os.makedirs(self.frames_dir, exist_ok=True)
+        self._index_path = os.path.join(self.cache_dir, "index.json")
+        self._index = self._load_index()
+        # 本次运行新增/更新的索引项，以及通过索引得到键的文件 (保存时不会被清理)
+        self._updated = {}
+        self._used = set()
+        self.hits = 0
+        self.misses = 0
+
+    def _load_index(self):
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return index if isinstance(index, dict) else {}
+
+    # 返回帧的缓存键；文件不存在时返回 None
+    def frame_key(self, image_path, frame_width, frame_height, image_mode):
+        abs_path = os.path.abspath(image_path)
+        try:
+            st = os.stat(abs_path)
+        except OSError:
+            return None
+        entry = self._index.get(abs_path)
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            content_hash = entry[2]
+            self._used.add(abs_path)
+        else:
+            try:
+                content_hash = _hash_file(abs_path)
+            except OSError:
+                return None
+            self._index[abs_path] = self._updated[abs_path] = [st.st_mtime_ns, st.st_size, content_hash]
+        return f"{content_hash}-{frame_width}x{frame_height}-{image_mode}"
+
+    def _entry_path(self, key):
+        return os.path.join(self.frames_dir, key[:2], key + ".frame")
+
+    def get(self, key):
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline().decode("utf-8"))
+                data = zlib.decompress(f.read())
+            img = Image.frombytes(header["mode"], tuple(header["size"]), data)
+            if header.get("palette"):
+                img.putpalette(header["palette"])
+        except (OSError, ValueError, KeyError, zlib.error):
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return img
+
+    def put(self, key, img):
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        header = {"mode": img.mode, "size": list(img.size)}
+        if img.mode == "P":
+            header["palette"] = img.getpalette()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(json.dumps(header).encode("utf-8") + b"\n")
+                f.write(zlib.compress(img.tobytes(), 1))
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    # 按最近使用时间淘汰超出容量的条目并保存索引；返回删除的条目数。
+    # 保存前重新读取磁盘上的索引 (可能已被其他进程更新) 并合并本次的更新，
+    # 再去掉内容哈希已没有缓存条目的记录 (源文件已删除或条目已被淘汰)，本次运行用到的记录除外
+    def flush(self):
+        removed, cached_hashes = self._evict()
+        on_disk = self._load_index()
+        merged = dict(on_disk)
+        merged.update(self._updated)
+        merged = {path: entry for path, entry in merged.items()
+                  if path in self._updated or path in self._used
+                  or (isinstance(entry, list) and len(entry) == 3 and entry[2] in cached_hashes)}
+        self._index = merged
+        if merged != on_disk:
+            tmp_path = f"{self._index_path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(merged, f)
+                os.replace(tmp_path, self._index_path)
+            except OSError:
+                pass
+        return removed
+
+    def evict(self):
+        return self._evict()[0]
+
+    # 返回 (删除的条目数, 仍有缓存条目的内容哈希集合)
+    def _evict(self):
+        entries = []
+        total = 0
+        for sub in os.scandir(self.frames_dir):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        removed = 0
+        if total > self.max_bytes:
+            entries.sort()
+            for i, (_, size, path) in enumerate(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                    removed += 1
+                    entries[i] = None
+                except OSError:
+                    pass
+        # 条目文件名以内容哈希开头: <哈希>-<宽>x<高>-<模式>.frame
+        cached_hashes = {os.path.basename(entry[2]).split("-", 1)[0] for entry in entries if entry is not None}
+        return removed, cached_hashes
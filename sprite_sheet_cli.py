@@ -0,0 +1,454 @@
+# -*- coding: utf-8 -*-
+# 序列图合并工具的命令行入口 (不导入 tkinter)，用于构建机批量生成序列图
+#
+# 用法示例:
+#   python sprite_sheet_cli.py merge frames/walk frames/run --jobs 4
+#   python sprite_sheet_cli.py merge --manifest sheets.json
+#   python sprite_sheet_cli.py atlas frames/walk --max-size 2048
+#   python sprite_sheet_cli.py profiles build/walk_spritesheet.png
+#   python sprite_sheet_cli.py merge --manifest sheets.json --timing-log build/timing.jsonl
+#   python sprite_sheet_cli.py watch frames/walk -o build/walk.png
+#   python sprite_sheet_cli.py slice build/walk_spritesheet.png --columns 8 --rows 4
+import os
+import sys
+import json
+import argparse
+import threading
+import concurrent.futures
+import multiprocessing
+import traceback
+
+from sprite_sheet_atlas import ATLAS_METADATA_FORMATS, create_atlas
+from sprite_sheet_cache import FrameCache, DEFAULT_CACHE_DIR, DEFAULT_CACHE_MAX_BYTES
+from sprite_sheet_encode import ENCODE_PROFILES, compare_encode_profiles
+from sprite_sheet_core import (PIL_AVAILABLE, MAX_DIMENSION, DEFAULT_DECODE_WORKERS, POOL_MODES,
+                               create_sprite_sheet, create_sprite_sheet_streaming,
+                               resolve_grid, suggest_output_path)
+from sprite_sheet_pages import create_paged_sprite_sheets
+from sprite_sheet_progress import RunMetrics, write_timing_log
+from sprite_sheet_slice import SLICE_FORMATS, slice_sprite_sheet, suggest_slice_dir
+from sprite_sheet_scan import DEFAULT_SCAN_CACHE_DIR, FRAME_SIZE_RULES, prescan_directory, choose_frame_size
+from sprite_sheet_watch import (DEFAULT_WATCH_INTERVAL, DEFAULT_WATCH_DEBOUNCE, DEFAULT_WATCH_ENCODE_PROFILE,
+                                SheetWatcher)
+
+
+# --- 读取任务清单 ---
+# 清单为 JSON 数组，每项至少包含 "input"，可选 "output"、"columns"、"rows"、"resize_output"、"streaming"、"dedupe"、"frame_size"、"max_texture"、
+# "encode_profile"、"quantize"；
+# 相对路径相对于清单文件所在目录解析
+def load_manifest(manifest_path):
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise ValueError("清单文件的顶层必须是 JSON 数组")
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    jobs = []
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = {"input": entry}
+        if not isinstance(entry, dict) or "input" not in entry:
+            raise ValueError(f"清单条目缺少 'input' 字段: {entry!r}")
+        job = dict(entry)
+        job["input"] = os.path.join(base_dir, entry["input"])
+        if entry.get("output"):
+            job["output"] = os.path.join(base_dir, entry["output"])
+        jobs.append(job)
+    return jobs
+
+
+def _make_status_callback(in_dir, quiet):
+    label = os.path.basename(os.path.normpath(in_dir)) or in_dir
+
+    def status_callback(message):
+        if not quiet or message.startswith(("错误", "警告", "成功")):
+            print(f"[{label}] {message}", flush=True)
+    return status_callback
+
+
+# --- 预扫描单个任务的输入目录；失败时返回 None ---
+def _scan_job_input(job, status_callback, metrics):
+    in_dir = job["input"]
+    if not os.path.isdir(in_dir):
+        status_callback(f"错误：输入目录未找到 {in_dir}")
+        return None
+    status_callback(f"正在扫描目录: {in_dir}")
+    metrics.begin("scan")
+    scan = prescan_directory(in_dir, cache_dir=DEFAULT_SCAN_CACHE_DIR if job.get("scan_cache", True) else None)
+    metrics.end()
+    if not scan.files:
+        status_callback(f"错误：在输入目录 '{in_dir}' 中未找到任何支持的图像文件。")
+        return None
+    status_callback(f"找到 {len(scan.files)} 个图像文件。已排序。")
+    status_callback(f"预扫描完成 (缓存命中 {scan.cached_count} 个，用时 {scan.elapsed * 1000:.0f} ms)：{scan.describe()}")
+    return scan
+
+
+# --- 执行任务并记录耗时统计；出错时输出错误信息 ---
+def _run_with_metrics(command, body, job, workers, quiet, *body_args):
+    in_dir = job["input"]
+    status_callback = _make_status_callback(in_dir, quiet)
+    metrics = RunMetrics()
+    metrics.info.update({"command": command, "input": os.path.abspath(in_dir), "workers": workers,
+                         "pool_mode": job.get("pool_mode", "thread")})
+    try:
+        success = body(job, workers, status_callback, metrics, *body_args)
+    except Exception as e:
+        status_callback(f"错误：处理任务时发生未预料的错误: {e}")
+        if not quiet:
+            traceback.print_exc()
+        success = False
+    metrics.info["success"] = success
+    status_callback(metrics.describe())
+    if job.get("timing_log"):
+        try:
+            write_timing_log(job["timing_log"], metrics.summary())
+        except OSError as log_e:
+            status_callback(f"警告：写入耗时日志失败: {log_e}")
+    return in_dir, success
+
+
+def _run_merge(job, workers, status_callback, metrics, allow_large, cache_options):
+    in_dir = job["input"]
+    scan = _scan_job_input(job, status_callback, metrics)
+    if scan is None:
+        return False
+    out_path = job.get("output") or suggest_output_path(in_dir)
+    metrics.info["output"] = os.path.abspath(out_path)
+    sorted_image_files = scan.files
+    file_count = len(sorted_image_files)
+    frame_size_rule = job.get("frame_size", "first")
+    frame_width, frame_height, image_mode = choose_frame_size(scan, frame_size_rule)
+    status_callback(f"单帧尺寸 (规则: {frame_size_rule}): {frame_width}x{frame_height} {image_mode}")
+
+    columns, rows = resolve_grid(file_count, job.get("columns"), job.get("rows"))
+    if columns * rows < file_count:
+        status_callback(f"警告：网格 {columns}x{rows} 只能容纳 {columns * rows} 帧，后面的 {file_count - columns * rows} 帧将被丢失。")
+    max_texture = job.get("max_texture")
+    if max_texture:
+        if job.get("streaming") or job.get("dedupe") or job.get("resize_output"):
+            status_callback("警告：分页输出时忽略 --streaming / --dedupe / --resize-output。")
+        success = create_paged_sprite_sheets(in_dir, columns, out_path, status_callback,
+                                             frame_width, frame_height, image_mode,
+                                             sorted_image_files[:columns * rows],
+                                             max_texture_size=max_texture, workers=workers,
+                                             pool_mode=job.get("pool_mode", "thread"),
+                                             encode_profile=job.get("encode_profile"),
+                                             quantize=bool(job.get("quantize")), metrics=metrics)
+        return success
+
+    total_width, total_height = frame_width * columns, frame_height * rows
+    streaming = bool(job.get("streaming"))
+    # 流式输出只占用一行帧的内存，不受超大尺寸限制
+    if (total_width > MAX_DIMENSION or total_height > MAX_DIMENSION) and not (allow_large or streaming):
+        status_callback(f"错误：序列图尺寸 {total_width}x{total_height} 超过 {MAX_DIMENSION}，如需继续请使用 --allow-large。")
+        return False
+
+    if streaming:
+        if job.get("dedupe"):
+            status_callback("警告：流式输出不支持去重，已忽略 --dedupe。")
+        if job.get("quantize"):
+            status_callback("警告：流式输出不支持调色板量化，已忽略 --quantize。")
+        success = create_sprite_sheet_streaming(in_dir, columns, rows, out_path, status_callback,
+                                                frame_width, frame_height, image_mode, sorted_image_files,
+                                                bool(job.get("resize_output")), workers=workers,
+                                                pool_mode=job.get("pool_mode", "thread"),
+                                                encode_profile=job.get("encode_profile"),
+                                                compress_workers=job.get("compress_workers", 1),
+                                                metrics=metrics)
+    else:
+        cache = FrameCache(**cache_options) if cache_options is not None else None
+        success = create_sprite_sheet(in_dir, columns, rows, out_path, status_callback,
+                                      frame_width, frame_height, image_mode, sorted_image_files,
+                                      bool(job.get("resize_output")), workers=workers,
+                                      pool_mode=job.get("pool_mode", "thread"), cache=cache,
+                                      dedupe=bool(job.get("dedupe")),
+                                      encode_profile=job.get("encode_profile"),
+                                      quantize=bool(job.get("quantize")), metrics=metrics)
+    return success
+
+
+# --- 执行单个合并任务 (可在子进程中运行) ---
+def run_job(job, workers=1, quiet=False, allow_large=False, cache_options=None):
+    return _run_with_metrics("merge", _run_merge, job, workers, quiet, allow_large, cache_options)
+
+
+def _run_atlas(job, workers, status_callback, metrics, atlas_options):
+    in_dir = job["input"]
+    scan = _scan_job_input(job, status_callback, metrics)
+    if scan is None:
+        return False
+    out_path = job.get("output") or suggest_output_path(in_dir, "_atlas")
+    metrics.info["output"] = os.path.abspath(out_path)
+    return create_atlas(in_dir, out_path, status_callback, scan.files,
+                        workers=workers, pool_mode=job.get("pool_mode", "thread"),
+                        encode_profile=job.get("encode_profile"),
+                        quantize=bool(job.get("quantize")), metrics=metrics, **(atlas_options or {}))
+
+
+# --- 执行单个图集打包任务 (可在子进程中运行) ---
+def run_atlas_job(job, workers=1, quiet=False, atlas_options=None):
+    return _run_with_metrics("atlas", _run_atlas, job, workers, quiet, atlas_options)
+
+
+# --- 汇总命令行与清单中的任务；参数错误时返回 None ---
+def _collect_jobs(args):
+    jobs = []
+    if args.manifest:
+        jobs.extend(load_manifest(args.manifest))
+    for in_dir in args.inputs:
+        job = {"input": in_dir}
+        if args.output:
+            job["output"] = args.output
+        jobs.append(job)
+    if not jobs:
+        print("错误：请指定至少一个输入目录或 --manifest 清单文件。", file=sys.stderr)
+        return None
+    if args.output and len(jobs) > 1:
+        print("错误：--output 只能在单个输入目录时使用。", file=sys.stderr)
+        return None
+    for job in jobs:
+        if args.no_scan_cache:
+            job["scan_cache"] = False
+        if args.encode_profile and not job.get("encode_profile"):
+            job["encode_profile"] = args.encode_profile
+        if args.quantize:
+            job["quantize"] = True
+        if args.pool_mode and not job.get("pool_mode"):
+            job["pool_mode"] = args.pool_mode
+        if args.timing_log:
+            job["timing_log"] = os.path.abspath(args.timing_log)
+    return jobs
+
+
+# --- 在进程池中并行执行任务并输出汇总 ---
+def _run_jobs(job_func, jobs, args, *job_args):
+    job_count = min(args.jobs or os.cpu_count() or 1, len(jobs))
+    # 多个任务并行时每个任务内部串行解码，避免进程数 x 线程数超额占用
+    workers = args.workers if args.workers else (DEFAULT_DECODE_WORKERS if job_count == 1 else 1)
+
+    results = []
+    if job_count <= 1:
+        for job in jobs:
+            results.append(job_func(job, workers, args.quiet, *job_args))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=job_count) as executor:
+            futures = [executor.submit(job_func, job, workers, args.quiet, *job_args) for job in jobs]
+            for future in futures:
+                results.append(future.result())
+
+    failed = [in_dir for in_dir, success in results if not success]
+    print(f"完成：成功 {len(results) - len(failed)} 个，失败 {len(failed)} 个。")
+    for in_dir in failed:
+        print(f"  失败: {in_dir}")
+    return 1 if failed else 0
+
+
+# --- merge 子命令 ---
+def cmd_merge(args):
+    jobs = _collect_jobs(args)
+    if jobs is None:
+        return 2
+    for job in jobs:
+        for key in ("columns", "rows"):
+            if getattr(args, key) and not job.get(key):
+                job[key] = getattr(args, key)
+        if args.resize_output:
+            job["resize_output"] = True
+        if args.streaming:
+            job["streaming"] = True
+        if args.dedupe:
+            job["dedupe"] = True
+        if args.frame_size and not job.get("frame_size"):
+            job["frame_size"] = args.frame_size
+        if args.max_texture and not job.get("max_texture"):
+            job["max_texture"] = args.max_texture
+        if args.compress_workers:
+            job["compress_workers"] = args.compress_workers
+
+    cache_options = None
+    if args.cache:
+        cache_options = {"cache_dir": args.cache_dir, "max_bytes": args.cache_size * 1024 * 1024}
+    return _run_jobs(run_job, jobs, args, args.allow_large, cache_options)
+
+
+# --- atlas 子命令 ---
+def cmd_atlas(args):
+    jobs = _collect_jobs(args)
+    if jobs is None:
+        return 2
+    atlas_options = {"max_size": args.max_size, "padding": args.padding,
+                     "power_of_two": not args.no_pot, "trim": not args.no_trim,
+                     "metadata_format": args.metadata, "dedupe": args.dedupe}
+    return _run_jobs(run_atlas_job, jobs, args, atlas_options)
+
+
+# --- watch 子命令：监视目录并增量更新序列图，Ctrl+C 退出 ---
+def cmd_watch(args):
+    if not os.path.isdir(args.input):
+        print(f"错误：输入目录未找到 {args.input}", file=sys.stderr)
+        return 2
+    out_path = args.output or suggest_output_path(args.input)
+    cache = FrameCache(args.cache_dir, args.cache_size * 1024 * 1024)
+    watcher = SheetWatcher(args.input, out_path, _make_status_callback(args.input, args.quiet),
+                           args.columns, args.rows, args.frame_size or "first", args.encode_profile,
+                           cache, args.workers or DEFAULT_DECODE_WORKERS)
+    stop_event = threading.Event()
+    try:
+        watcher.run(stop_event, args.interval, args.debounce)
+    except KeyboardInterrupt:
+        print("已停止监视。")
+    return 0
+
+
+# --- slice 子命令：把序列图拆回单帧文件 ---
+def cmd_slice(args):
+    if not os.path.isfile(args.sheet):
+        print(f"错误：文件未找到 {args.sheet}", file=sys.stderr)
+        return 2
+    out_dir = args.output or suggest_slice_dir(args.sheet)
+    status_callback = _make_status_callback(args.sheet, args.quiet)
+    metrics = RunMetrics()
+    metrics.info.update({"command": "slice", "input": os.path.abspath(args.sheet), "workers": args.workers})
+    success = slice_sprite_sheet(args.sheet, out_dir, status_callback, args.columns, args.rows,
+                                 args.frame_width, args.frame_height, args.count, args.drop_empty_tail,
+                                 args.prefix, args.format, args.encode_profile,
+                                 args.workers or DEFAULT_DECODE_WORKERS, metrics)
+    metrics.info["success"] = success
+    status_callback(metrics.describe())
+    if args.timing_log:
+        try:
+            write_timing_log(args.timing_log, metrics.summary())
+        except OSError as log_e:
+            status_callback(f"警告：写入耗时日志失败: {log_e}")
+    return 0 if success else 1
+
+
+# --- profiles 子命令：按各编码档位重新编码已有的序列图并比较耗时与大小 ---
+def cmd_profiles(args):
+    if not os.path.isfile(args.sheet):
+        print(f"错误：文件未找到 {args.sheet}", file=sys.stderr)
+        return 2
+    results = compare_encode_profiles(args.sheet, args.formats, args.quantize)
+    print(f"{'档位':<10}{'格式':<6}{'用时(s)':>10}{'大小(字节)':>16}")
+    for profile, fmt, elapsed, byte_count in results:
+        print(f"{profile:<10}{fmt.upper():<6}{elapsed:>10.2f}{byte_count:>16,}")
+    return 0
+
+
+def _add_job_arguments(subparser):
+    subparser.add_argument("inputs", nargs="*", help="序列帧目录")
+    subparser.add_argument("--manifest", help="JSON 任务清单文件")
+    subparser.add_argument("-o", "--output", help="输出文件路径 (仅限单个输入目录)")
+    subparser.add_argument("-j", "--jobs", type=int, help="并行处理的目录数 (默认 CPU 核心数)")
+    subparser.add_argument("--workers", type=int, help="每个任务内并行解码帧的线程数")
+    subparser.add_argument("--pool-mode", choices=POOL_MODES,
+                           help="并行解码使用的工作池: thread=线程池 (默认), process=进程池")
+    subparser.add_argument("--dedupe", action="store_true", help="相同像素内容的帧只保存一份，并输出帧到格子/矩形的映射")
+    subparser.add_argument("--no-scan-cache", action="store_true", help="不读取/写入目录预扫描缓存")
+    subparser.add_argument("--encode-profile", choices=tuple(ENCODE_PROFILES),
+                           help="编码档位: fast=最快, balanced=均衡, smallest=最小体积 (默认使用 Pillow 默认参数)")
+    subparser.add_argument("--quantize", action="store_true", help="输出前量化为 256 色调色板 (适合像素风资源)")
+    subparser.add_argument("--timing-log", help="以 JSON Lines 格式追加每个任务的分阶段耗时统计")
+    subparser.add_argument("-q", "--quiet", action="store_true", help="只输出错误、警告和结果")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="sprite_sheet_cli", description="序列图合并工具 (命令行版)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    merge = subparsers.add_parser("merge", help="将一个或多个序列帧目录合并为序列图")
+    _add_job_arguments(merge)
+    merge.add_argument("--columns", type=int, help="列数 (默认按帧数推荐)")
+    merge.add_argument("--rows", type=int, help="行数 (默认按帧数推荐)")
+    merge.add_argument("--frame-size", choices=FRAME_SIZE_RULES,
+                       help="单帧尺寸规则: first=首帧 (默认), max=最大宽高, mode=出现最多的尺寸")
+    merge.add_argument("--resize-output", action="store_true", help="将最终输出压缩到单帧大小")
+    merge.add_argument("--streaming", action="store_true", help="逐行流式写出 PNG，峰值内存只与一行帧有关")
+    merge.add_argument("--cache", action="store_true", help="启用帧缓存，增量重建时只重新解码变化的帧")
+    merge.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help=f"帧缓存目录 (默认 {DEFAULT_CACHE_DIR})")
+    merge.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024),
+                       help="帧缓存容量上限 (MB)，超出后按最近使用时间淘汰")
+    merge.add_argument("--max-texture", type=int,
+                       help="分页输出：每页边长不超过该值 (如 4096/8192)，并生成 .pages.json 帧索引")
+    merge.add_argument("--compress-workers", type=int,
+                       help="流式输出时并行压缩行带的线程数 (默认 1)")
+    merge.add_argument("--allow-large", action="store_true", help=f"允许边长超过 {MAX_DIMENSION} 的序列图")
+    merge.set_defaults(func=cmd_merge)
+
+    atlas = subparsers.add_parser("atlas", help="裁剪透明边框并紧密打包为图集，同时输出帧位置元数据")
+    _add_job_arguments(atlas)
+    atlas.add_argument("--max-size", type=int, default=4096, help="图集最大边长 (默认 4096)")
+    atlas.add_argument("--padding", type=int, default=1, help="帧之间的间距像素 (默认 1)")
+    atlas.add_argument("--no-pot", action="store_true", help="不要求图集边长为 2 的幂")
+    atlas.add_argument("--no-trim", action="store_true", help="保留帧的透明边框")
+    atlas.add_argument("--metadata", choices=ATLAS_METADATA_FORMATS, default="json", help="元数据格式 (默认 json)")
+    atlas.set_defaults(func=cmd_atlas)
+
+    watch = subparsers.add_parser("watch", help="监视序列帧目录，帧文件变化后自动增量更新序列图")
+    watch.add_argument("input", help="序列帧目录")
+    watch.add_argument("-o", "--output", help="输出文件路径 (PNG/BMP/TIFF 支持增量更新)")
+    watch.add_argument("--columns", type=int, help="列数 (默认按首次构建时的帧数推荐，之后保持不变)")
+    watch.add_argument("--rows", type=int, help="行数 (默认随帧数自动调整)")
+    watch.add_argument("--frame-size", choices=FRAME_SIZE_RULES, help="单帧尺寸规则 (默认 first)")
+    watch.add_argument("--encode-profile", choices=tuple(ENCODE_PROFILES), default=DEFAULT_WATCH_ENCODE_PROFILE,
+                       help=f"编码档位 (默认 {DEFAULT_WATCH_ENCODE_PROFILE}，保存最快)")
+    watch.add_argument("--interval", type=float, default=DEFAULT_WATCH_INTERVAL,
+                       help=f"轮询目录的间隔秒数 (默认 {DEFAULT_WATCH_INTERVAL})")
+    watch.add_argument("--debounce", type=float, default=DEFAULT_WATCH_DEBOUNCE,
+                       help=f"目录停止变化多少秒后开始更新 (默认 {DEFAULT_WATCH_DEBOUNCE})")
+    watch.add_argument("--workers", type=int, help="并行解码帧的线程数")
+    watch.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help=f"帧缓存目录 (默认 {DEFAULT_CACHE_DIR})")
+    watch.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024),
+                       help="帧缓存容量上限 (MB)")
+    watch.add_argument("-q", "--quiet", action="store_true", help="只输出错误、警告和结果")
+    watch.set_defaults(func=cmd_watch)
+
+    slicer = subparsers.add_parser("slice", help="按网格把序列图拆回单帧文件 (合并的逆操作)")
+    slicer.add_argument("sheet", help="序列图文件")
+    slicer.add_argument("-o", "--output", help="输出目录 (默认 <序列图文件名>_frames)")
+    slicer.add_argument("--columns", type=int, help="列数")
+    slicer.add_argument("--rows", type=int, help="行数")
+    slicer.add_argument("--frame-width", type=int, help="单帧宽度 (与列数二选一即可)")
+    slicer.add_argument("--frame-height", type=int, help="单帧高度 (与行数二选一即可)")
+    slicer.add_argument("--count", type=int, help="只输出前 N 帧")
+    slicer.add_argument("--drop-empty-tail", action="store_true", help="去掉末尾未填充的空格子")
+    slicer.add_argument("--prefix", help="输出文件名前缀 (默认取序列图文件名)")
+    slicer.add_argument("--format", choices=SLICE_FORMATS, default="png", help="输出格式 (默认 png)")
+    slicer.add_argument("--encode-profile", choices=tuple(ENCODE_PROFILES), help="PNG 编码档位")
+    slicer.add_argument("--workers", type=int, help="并行编码帧的线程数")
+    slicer.add_argument("--timing-log", help="以 JSON Lines 格式追加分阶段耗时统计")
+    slicer.add_argument("-q", "--quiet", action="store_true", help="只输出错误、警告和结果")
+    slicer.set_defaults(func=cmd_slice)
+
+    profiles = subparsers.add_parser("profiles", help="按各编码档位重新编码序列图，比较编码用时与文件大小")
+    profiles.add_argument("sheet", help="已生成的序列图文件")
+    profiles.add_argument("--formats", nargs="+", choices=("png", "webp", "jpeg"), default=["png", "webp"],
+                          help="要比较的输出格式 (默认 png webp)")
+    profiles.add_argument("--quantize", action="store_true", help="比较前先量化为 256 色调色板")
+    profiles.set_defaults(func=cmd_profiles)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    for key in ("columns", "rows", "jobs", "workers", "cache_size", "max_size", "max_texture",
+                "compress_workers", "frame_width", "frame_height", "count"):
+        value = getattr(args, key, None)
+        if value is not None and value <= 0:
+            parser.error(f"--{key.replace('_', '-')} 必须是正整数")
+    if getattr(args, "padding", 0) < 0:
+        parser.error("--padding 不能为负数")
+    for key in ("interval", "debounce"):
+        value = getattr(args, key, None)
+        if value is not None and value < 0:
+            parser.error(f"--{key} 不能为负数")
+    if not PIL_AVAILABLE:
+        print("依赖错误：缺少 Pillow 库。请使用 'pip install Pillow' 命令安装。", file=sys.stderr)
+        return 2
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,656 @@
+# -*- coding: utf-8 -*-
+# 序列图合并的核心流程 (不依赖 tkinter)，供 GUI 与命令行共用
+import os
+import re
+import json
+import hashlib
+import time
+import math
+import importlib
+import importlib.util
+import traceback
+
+from sprite_sheet_encode import ENCODE_PROFILES, save_image, report_encode
+from sprite_sheet_png import PNG_COLOR_TYPES, StreamingPNGWriter
+from sprite_sheet_pool import POOL_MODES, ordered_map
+from sprite_sheet_progress import RunMetrics
+
+# Pillow import
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    Image = None
+    PIL_AVAILABLE = False
+
+# Pillow 默认只预载 BMP/GIF/JPEG/PPM/PNG 插件，遇到其他格式时 Image.init() 会一次导入全部插件；
+# 预先注册读写 TIFF/WebP 所需的插件，常用格式就不会触发这次全量导入
+if PIL_AVAILABLE:
+    for _plugin in ("TiffImagePlugin", "WebPImagePlugin"):
+        try:
+            importlib.import_module("PIL." + _plugin)
+        except ImportError:
+            pass
+
+# NumPy 为可选依赖，仅用于数组画布；启动时只检查是否已安装，首次创建数组画布时才导入
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+# 支持合并的输入图像扩展名
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff'}
+# 超过该边长的序列图需要确认 (GUI) 或显式允许 (命令行)
+MAX_DIMENSION = 16384
+# 并行解码帧时使用的默认工作线程数 (Pillow 解码/缩放期间会释放 GIL)
+DEFAULT_DECODE_WORKERS = min(8, os.cpu_count() or 1)
+# 可由 Image.frombuffer 直接共享 NumPy 内存 (不复制) 的模式。
+# RGB 在 Pillow 内部按每像素 4 字节存储，逐帧 tobytes 打包再在保存前整体展开，实测比 Image.paste 慢约 3 倍，仍使用 paste
+ARRAY_CANVAS_MODES = ('L', 'RGBA')
+# 单帧小于该字节数时逐帧复制到数组的开销超过省下的画布初始化时间，仍使用 Image.paste
+ARRAY_CANVAS_MIN_FRAME_BYTES = 16 * 1024
+
+# --- 核心逻辑函数 (自然排序) ---
+def natural_sort_key(s):
+    return [int(text) if text.isdigit() else text.lower()
+            for text in re.split('([0-9]+)', s)]
+
+# --- 核心逻辑函数 (扫描目录) ---
+def scan_image_files(input_dir):
+    all_files = [f for f in os.listdir(input_dir) if os.path.isfile(os.path.join(input_dir, f))]
+    image_files = [f for f in all_files if os.path.splitext(f)[1].lower() in IMAGE_EXTENSIONS]
+    image_files.sort(key=natural_sort_key)
+    return image_files
+
+# --- 核心逻辑函数 (推荐网格) ---
+def recommend_grid(file_count):
+    recommended_cols = math.ceil(math.sqrt(file_count))
+    recommended_rows = math.ceil(file_count / recommended_cols)
+    return recommended_cols, recommended_rows
+
+# --- 计算网格 ---
+# 未指定行列时使用推荐网格；只指定列数时按文件数计算行数
+def resolve_grid(file_count, columns=None, rows=None):
+    if columns and rows:
+        return columns, rows
+    if columns:
+        return columns, -(-file_count // columns)
+    if rows:
+        return -(-file_count // rows), rows
+    return recommend_grid(file_count)
+
+# --- 核心逻辑函数 (建议输出路径) ---
+def suggest_output_path(input_dir, suffix="_spritesheet"):
+    input_dir = os.path.normpath(input_dir)
+    base = os.path.basename(input_dir)
+    safe_base = "".join(c for c in base if c.isalnum() or c in ('_', '-')).rstrip()
+    if not safe_base:
+        safe_base = "output"
+    return os.path.join(os.path.dirname(input_dir), f"{safe_base}{suffix}.png")
+
+# --- 核心逻辑函数 (单帧解码) ---
+# 并行模式下在工作线程/进程中执行；状态信息随结果返回，由主线程按帧顺序输出。
+# frame_width/frame_height 为 None 时保持原尺寸
+def _load_frame(image_path, filename, frame_width, frame_height, image_mode):
+    messages = []
+    try:
+        with Image.open(image_path) as img:
+            img_to_paste = img
+            if frame_width is not None and img.size != (frame_width, frame_height):
+                messages.append(f"信息：调整图像 {filename} 的尺寸...")
+                img_to_paste = img.resize((frame_width, frame_height), Image.Resampling.LANCZOS)
+            if img_to_paste.mode != image_mode:
+                messages.append(f"信息：转换图像 {filename} 的模式...")
+                try:
+                    img_to_paste = img_to_paste.convert(image_mode)
+                except Exception as convert_e:
+                    messages.append(f"警告：转换图像 {filename} 模式失败: {convert_e}。")
+            if img_to_paste is img:
+                # 文件在 with 结束时关闭，需要保留一份已解码的副本
+                img_to_paste = img.copy()
+            return img_to_paste, messages
+    except FileNotFoundError:
+        messages.append(f"错误：无法找到图像文件 {filename}，已跳过。")
+    except Exception as paste_e:
+        messages.append(f"错误：处理或粘贴图像 {filename} 时出错: {paste_e}，已跳过。")
+    return None, messages
+
+# --- 核心逻辑函数 (按顺序产出已解码的帧) ---
+# workers <= 1 时逐帧串行处理；否则使用线程池或进程池并行解码，
+# 同时在途的任务数限制为 workers * 2，避免大量 4K 帧同时驻留内存
+def _iter_loaded_frames(input_dir, image_files, frame_width, frame_height, image_mode,
+                        status_callback, workers=1, pool_mode="thread"):
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(image_files) <= 1:
+        for i, filename in enumerate(image_files):
+            image_path = os.path.join(input_dir, filename)
+            img, messages = _load_frame(image_path, filename, frame_width, frame_height, image_mode)
+            for message in messages:
+                status_callback(message)
+            yield i, filename, img
+        return
+
+    arg_list = [(os.path.join(input_dir, filename), filename, frame_width, frame_height, image_mode)
+                for filename in image_files]
+    for index, future in ordered_map(_load_frame, arg_list, workers, pool_mode):
+        img, messages = future.result()
+        for message in messages:
+            status_callback(message)
+        yield index, image_files[index], img
+
+# --- 核心逻辑函数 (图像合并) ---
+def create_sprite_sheet(input_dir, columns, rows, output_path, status_callback,
+                        frame_width, frame_height, image_mode,
+                        sorted_image_files, resize_output,
+                        workers=1, pool_mode="thread", cache=None, dedupe=False,
+                        encode_profile=None, quantize=False, metrics=None, atomic_save=False):
+    status_callback(f"开始合并: 网格={columns}x{rows}, 单帧={frame_width}x{frame_height}")
+    if metrics is None:
+        metrics = RunMetrics()
+    try:
+        file_count = len(sorted_image_files)
+        if file_count == 0:
+             status_callback("错误：没有找到需要合并的图像文件。")
+             return False
+        status_callback(f"使用 {file_count} 个已排序图像文件。")
+
+        if dedupe and resize_output:
+            # 压缩到单帧大小后输出中不再有网格，帧映射文件无从对应
+            status_callback("警告：压缩到单帧大小时不支持去重，已忽略去重选项。")
+            dedupe = False
+        if dedupe and cache is not None:
+            status_callback("信息：去重模式下不使用增量更新。")
+            cache = None
+
+        total_width = frame_width * columns
+        total_height = frame_height * rows
+        status_callback(f"创建序列图画布: {total_width}x{total_height} (模式: {image_mode})")
+
+        try:
+            if _array_canvas_supported(image_mode, frame_width, frame_height):
+                sprite_sheet = _ArrayCanvas(columns, rows, frame_width, frame_height, image_mode)
+            else:
+                sprite_sheet = Image.new(image_mode, (total_width, total_height))
+        except ValueError as ve:
+            status_callback(f"警告：图像模式 '{image_mode}' 无效 ({ve})，尝试使用 'RGBA'。")
+            try:
+                image_mode = 'RGBA'
+                sprite_sheet = Image.new(image_mode, (total_width, total_height))
+            except Exception as fallback_e:
+                 status_callback(f"错误：无法创建图像画布: {fallback_e}")
+                 return False
+
+        max_images = columns * rows
+        frame_files = sorted_image_files[:max_images]
+        cells = None
+        frame_cells = None
+        if dedupe:
+            metrics.begin("frames", len(frame_files))
+            unique_count, frame_cells = _paste_unique_frames(
+                sprite_sheet, input_dir, frame_files, columns, frame_width, frame_height,
+                image_mode, status_callback, workers, pool_mode, metrics)
+            if not unique_count:
+                status_callback("错误：没有成功解码的图像帧。")
+                return False
+            # 网格只需容纳不重复的帧；它们按首次出现的顺序占用格子，裁掉画布末尾未用到的行 (或列) 即可
+            columns = min(columns, unique_count)
+            rows = math.ceil(unique_count / columns)
+            total_width = frame_width * columns
+            total_height = frame_height * rows
+            sprite_sheet = _crop_grid(sprite_sheet, columns, rows, frame_width, frame_height)
+            processed_count = sum(c is not None for c in frame_cells)
+            status_callback(f"去重：{processed_count} 帧中有 {unique_count} 个不同的帧，网格调整为 {columns}x{rows}。")
+        elif cache is not None:
+            metrics.begin("frames", len(frame_files))
+            sprite_sheet, processed_count, cells = _paste_frames_incremental(
+                sprite_sheet, input_dir, frame_files, columns, rows, output_path,
+                status_callback, frame_width, frame_height, image_mode,
+                resize_output, workers, pool_mode, cache, metrics)
+        else:
+            metrics.begin("frames", len(frame_files))
+            processed_count = 0
+            frames = _iter_loaded_frames(input_dir, frame_files,
+                                         frame_width, frame_height, image_mode,
+                                         status_callback, workers, pool_mode)
+            for i, filename, img_to_paste in frames:
+                if img_to_paste is None:
+                    metrics.advance(i)
+                    continue
+                if _paste_frame(sprite_sheet, img_to_paste, filename, i, columns,
+                                frame_width, frame_height, status_callback):
+                    processed_count += 1
+                metrics.advance(i, _frame_bytes(img_to_paste))
+        metrics.end()
+        if file_count > max_images:
+            status_callback(f"信息：图像数量 ({file_count}) 超出网格容量 ({max_images})，已停止处理多余帧。")
+
+        status_callback(f"已处理 {processed_count} 张图像。")
+
+        if isinstance(sprite_sheet, _ArrayCanvas):
+            sprite_sheet = sprite_sheet.to_image()
+        final_image_to_save = sprite_sheet
+        if resize_output:
+            metrics.begin("resize")
+            status_callback(f"检测到压缩选项：正在将图像从 {total_width}x{total_height} 压缩到 {frame_width}x{frame_height}...")
+            try:
+                final_image_to_save = sprite_sheet.resize((frame_width, frame_height), Image.Resampling.LANCZOS)
+                status_callback("压缩完成。")
+            except Exception as resize_e:
+                status_callback(f"错误：压缩图像时出错: {resize_e}。将尝试保存原始大图。")
+                final_image_to_save = sprite_sheet
+
+        try:
+            _ensure_output_dir(output_path, status_callback)
+            metrics.begin("save")
+            # 先删除旧的格子记录：不使用缓存的保存不会再更新它，保存中断时下次运行也会完整重建而不是沿用不匹配的格子
+            _remove_cells_file(output_path)
+            # 旧的帧映射同样只在本次去重保存成功后重新写出，避免拆分时按不再对应的网格还原
+            _remove_frame_map(output_path)
+            _, byte_count = save_image(final_image_to_save, output_path, status_callback, encode_profile, quantize,
+                                       atomic_save)
+            metrics.add_bytes(byte_count)
+            metrics.end()
+            if resize_output and final_image_to_save != sprite_sheet:
+                 status_callback(f"成功！压缩后的序列图已保存至: {output_path}")
+            else:
+                 status_callback(f"成功！序列图已保存至: {output_path}")
+            if frame_cells is not None:
+                frame_map_path = _write_frame_map(output_path, frame_files, frame_cells,
+                                                  columns, rows, frame_width, frame_height)
+                status_callback(f"帧到格子的映射已保存至: {frame_map_path}")
+            if cache is not None:
+                _write_cells_file(output_path, columns, rows, frame_width, frame_height,
+                                  image_mode, cells if final_image_to_save is sprite_sheet else None)
+                cache.flush()
+            return True
+        except Exception as save_e:
+            status_callback(f"错误：保存最终序列图到 {output_path} 时失败: {save_e}")
+            return False
+
+    except Exception as e:
+        status_callback(f"合并核心逻辑时发生未预料的错误: {e}")
+        _write_core_error_log("create_sprite_sheet", status_callback)
+        return False
+
+
+# --- 数组画布 ---
+# 所有帧经 _load_frame 统一为相同尺寸与模式后，直接写入预先分配的
+# (行, 帧高, 列, 帧宽, 通道) 数组；该布局按行展开后即为整张序列图的像素缓冲区。
+# numpy.zeros 按需分配清零的内存页，省去 Image.new 对整张画布的初始化，
+# 最终由 Image.frombuffer 共享数组内存生成图像，压缩输出 (resize_output) 也直接读取这块缓冲区
+def _array_canvas_supported(image_mode, frame_width, frame_height):
+    return (NUMPY_AVAILABLE and image_mode in ARRAY_CANVAS_MODES
+            and frame_width * frame_height * len(image_mode) >= ARRAY_CANVAS_MIN_FRAME_BYTES)
+
+class _ArrayCanvas:
+    def __init__(self, columns, rows, frame_width, frame_height, image_mode):
+        self.mode = image_mode
+        self.size = (columns * frame_width, rows * frame_height)
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        import numpy
+        self.array = numpy.zeros((rows, frame_height, columns, frame_width, len(image_mode)), dtype=numpy.uint8)
+
+    # 与 Image.paste 相同的调用方式 (box 为格子左上角)，供 _paste_frame 使用
+    def paste(self, img, box):
+        if img.mode != self.mode or img.size != (self.frame_width, self.frame_height):
+            raise ValueError(f"帧为 {img.size[0]}x{img.size[1]} {img.mode}，与画布格子 "
+                             f"{self.frame_width}x{self.frame_height} {self.mode} 不一致")
+        row, col = box[1] // self.frame_height, box[0] // self.frame_width
+        import numpy
+        pixels = numpy.frombuffer(img.tobytes(), dtype=numpy.uint8)
+        self.array[row, :, col] = pixels.reshape(self.frame_height, self.frame_width, len(self.mode))
+
+    # 增量更新：把上次输出的序列图一次性复制进数组的前几行 (宽度与模式须与画布一致，高度为整行)
+    def paste_sheet(self, img):
+        rows = img.height // self.frame_height
+        if (img.mode != self.mode or img.width != self.size[0]
+                or img.height != rows * self.frame_height or rows > self.array.shape[0]):
+            raise ValueError(f"上次输出为 {img.size[0]}x{img.size[1]} {img.mode}，与画布 "
+                             f"{self.size[0]}x{self.size[1]} {self.mode} 不一致")
+        import numpy
+        pixels = numpy.frombuffer(img.tobytes(), dtype=numpy.uint8)
+        self.array[:rows] = pixels.reshape((rows,) + self.array.shape[1:])
+
+    # 只保留前 rows 行、前 columns 列的格子 (数组视图，不复制像素)
+    def crop_grid(self, columns, rows):
+        self.array = self.array[:rows, :, :columns]
+        self.size = (columns * self.frame_width, rows * self.frame_height)
+
+    def to_image(self):
+        import numpy
+        # 只裁掉行时数组仍然连续，直接共享内存；裁掉列 (仅剩一行) 时复制这一行
+        return Image.frombuffer(self.mode, self.size, numpy.ascontiguousarray(self.array), 'raw', self.mode, 0, 1)
+
+# 解码后单帧占用的像素字节数 (用于进度统计)
+def _frame_bytes(img):
+    return img.width * img.height * len(img.getbands())
+
+# --- 核心逻辑函数 (粘贴单帧到网格) ---
+def _paste_frame(sprite_sheet, img_to_paste, filename, index, columns,
+                 frame_width, frame_height, status_callback):
+    paste_x = (index % columns) * frame_width
+    paste_y = (index // columns) * frame_height
+    try:
+         sprite_sheet.paste(img_to_paste, (paste_x, paste_y))
+         return True
+    except Exception as paste_e:
+         status_callback(f"错误：处理或粘贴图像 {filename} 时出错: {paste_e}，已跳过。")
+         return False
+
+# --- 核心逻辑函数 (增量合并) ---
+# 仅重新解码内容变化的帧：未变化的格子直接沿用上次的输出，其余格子优先从帧缓存读取。
+# 返回 (画布, 成功处理的帧数, 每个格子的缓存键列表)
+def _paste_frames_incremental(sprite_sheet, input_dir, frame_files, columns, rows, output_path,
+                              status_callback, frame_width, frame_height, image_mode,
+                              resize_output, workers, pool_mode, cache, metrics):
+    cells = [cache.frame_key(os.path.join(input_dir, filename), frame_width, frame_height, image_mode)
+             for filename in frame_files]
+    cells += [None] * (columns * rows - len(cells))
+
+    previous_cells = None
+    if not resize_output:
+        previous_cells = _read_cells_file(output_path, columns, rows, frame_width, frame_height, image_mode)
+    if previous_cells is not None:
+        try:
+            with Image.open(output_path) as previous_img:
+                if (previous_img.width == sprite_sheet.size[0] and previous_img.mode == image_mode
+                        and previous_img.height % frame_height == 0):
+                    sprite_sheet = _paste_previous_sheet(sprite_sheet, previous_img)
+                else:
+                    previous_cells = None
+        except Exception:
+            previous_cells = None
+    if previous_cells is not None:
+        status_callback(f"增量更新：复用上次输出 {output_path}")
+    else:
+        previous_cells = [None] * (columns * rows)
+
+    blank = None
+    reused_count = 0
+    cached_count = 0
+    processed_count = 0
+    decode_indices = []
+    for i, key in enumerate(cells):
+        if key is not None and key == previous_cells[i]:
+            reused_count += 1
+            if i < len(frame_files):
+                metrics.advance(i)
+            continue
+        if previous_cells[i] is not None:
+            # 旧内容已失效，先清空该格子
+            if blank is None:
+                blank = Image.new(image_mode, (frame_width, frame_height))
+            _paste_frame(sprite_sheet, blank, "", i, columns, frame_width, frame_height, status_callback)
+        if i >= len(frame_files):
+            continue
+        cached_img = cache.get(key) if key is not None else None
+        if cached_img is not None and _paste_frame(sprite_sheet, cached_img, frame_files[i], i, columns,
+                                                   frame_width, frame_height, status_callback):
+            cached_count += 1
+            metrics.advance(i, _frame_bytes(cached_img))
+        else:
+            decode_indices.append(i)
+
+    frames = _iter_loaded_frames(input_dir, [frame_files[i] for i in decode_indices],
+                                 frame_width, frame_height, image_mode,
+                                 status_callback, workers, pool_mode)
+    for j, filename, img_to_paste in frames:
+        i = decode_indices[j]
+        if img_to_paste is not None and _paste_frame(sprite_sheet, img_to_paste, filename, i, columns,
+                                                     frame_width, frame_height, status_callback):
+            processed_count += 1
+            if cells[i] is not None:
+                cache.put(cells[i], img_to_paste)
+            metrics.advance(i, _frame_bytes(img_to_paste))
+        else:
+            cells[i] = None
+            metrics.advance(i)
+
+    status_callback(f"增量更新：沿用 {reused_count} 帧，缓存命中 {cached_count} 帧，重新解码 {len(decode_indices)} 帧。")
+    return sprite_sheet, reused_count + cached_count + processed_count, cells
+
+# 以上次的输出作为画布初值：数组画布复制进数组，尺寸相同的普通画布直接复制该图像。
+# 行数变化时只取两者共有的行，贴到新画布的顶部
+def _paste_previous_sheet(sprite_sheet, previous_img):
+    previous_img.load()
+    width, height = sprite_sheet.size
+    if previous_img.height > height:
+        previous_img = previous_img.crop((0, 0, width, height))
+    if isinstance(sprite_sheet, _ArrayCanvas):
+        sprite_sheet.paste_sheet(previous_img)
+        return sprite_sheet
+    if previous_img.size == sprite_sheet.size:
+        return previous_img.copy()
+    sprite_sheet.paste(previous_img, (0, 0))
+    return sprite_sheet
+
+# --- 核心逻辑函数 (帧去重) ---
+# 对解码并规范化后的像素数据求哈希 (hashlib 直接处理整块原始缓冲区)，相同内容的帧只保留一份。
+# 不重复的帧按首次出现的顺序依次占用格子，解码后立即粘贴到画布，不在内存中另存一份。
+# 返回 (不重复的帧数, 每帧对应的格子序号；解码或粘贴失败的帧为 None)
+def _paste_unique_frames(sprite_sheet, input_dir, frame_files, columns, frame_width, frame_height,
+                         image_mode, status_callback, workers, pool_mode, metrics):
+    cell_by_digest = {}
+    frame_cells = [None] * len(frame_files)
+    frames = _iter_loaded_frames(input_dir, frame_files, frame_width, frame_height, image_mode,
+                                 status_callback, workers, pool_mode)
+    for i, filename, img in frames:
+        if img is None:
+            metrics.advance(i)
+            continue
+        metrics.advance(i, _frame_bytes(img))
+        digest = frame_digest(img)
+        cell = cell_by_digest.get(digest)
+        if cell is None:
+            cell = len(cell_by_digest)
+            if not _paste_frame(sprite_sheet, img, filename, cell, columns,
+                                frame_width, frame_height, status_callback):
+                continue
+            cell_by_digest[digest] = cell
+        frame_cells[i] = cell
+    return len(cell_by_digest), frame_cells
+
+# 去重后裁掉画布末尾未用到的格子；数组画布只截取视图，普通画布尺寸不变时不复制
+def _crop_grid(sprite_sheet, columns, rows, frame_width, frame_height):
+    size = (columns * frame_width, rows * frame_height)
+    if sprite_sheet.size == size:
+        return sprite_sheet
+    if isinstance(sprite_sheet, _ArrayCanvas):
+        sprite_sheet.crop_grid(columns, rows)
+        return sprite_sheet
+    return sprite_sheet.crop((0, 0) + size)
+
+def frame_digest(img):
+    digest = hashlib.blake2b(img.tobytes(), digest_size=16)
+    digest.update(f"{img.mode}|{img.size[0]}x{img.size[1]}".encode("ascii"))
+    return digest.digest()
+
+# 与输出文件并列的 <输出文件名>.frames.json，供引擎按帧序号查找共享的格子
+def _frame_map_path(output_path):
+    return os.path.splitext(output_path)[0] + ".frames.json"
+
+def _write_frame_map(output_path, frame_files, frame_cells, columns, rows, frame_width, frame_height):
+    frame_map_path = _frame_map_path(output_path)
+    with open(frame_map_path, "w", encoding="utf-8") as f:
+        json.dump({"image": os.path.basename(output_path), "columns": columns, "rows": rows,
+                   "frame_width": frame_width, "frame_height": frame_height,
+                   "cells": len({c for c in frame_cells if c is not None}),
+                   "frames": [{"filename": name, "cell": cell}
+                              for name, cell in zip(frame_files, frame_cells)]},
+                  f, ensure_ascii=False, indent=1)
+    return frame_map_path
+
+def _remove_frame_map(output_path):
+    try:
+        os.remove(_frame_map_path(output_path))
+    except OSError:
+        pass
+
+# --- 辅助函数 (格子记录文件) ---
+# 与输出文件并列的 <输出文件>.cells.json 记录每个格子对应的帧缓存键，
+# 仅在无损格式下启用，避免有损格式被反复解码/编码累积失真。
+# 同时记录写入时输出文件的 (mtime_ns, 大小)：输出被其他方式覆盖或修改后记录即失效
+INCREMENTAL_FORMATS = {'.png', '.bmp', '.tif', '.tiff'}
+
+def _cells_file_path(output_path):
+    return output_path + ".cells.json"
+
+def _read_cells_file(output_path, columns, rows, frame_width, frame_height, image_mode):
+    if os.path.splitext(output_path)[1].lower() not in INCREMENTAL_FORMATS:
+        return None
+    if not os.path.isfile(output_path):
+        return None
+    try:
+        with open(_cells_file_path(output_path), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    try:
+        st = os.stat(output_path)
+    except OSError:
+        return None
+    # 行数可以不同 (追加或删减帧后网格增减了行)：沿用的格子按序号对应，多出的行丢弃，新增的行为空
+    expected = {"columns": columns, "frame_width": frame_width,
+                "frame_height": frame_height, "image_mode": image_mode,
+                "output": [st.st_mtime_ns, st.st_size]}
+    if any(data.get(k) != v for k, v in expected.items()):
+        return None
+    previous_rows = data.get("rows")
+    cells = data.get("cells")
+    if (not isinstance(previous_rows, int) or previous_rows <= 0
+            or not isinstance(cells, list) or len(cells) != columns * previous_rows):
+        return None
+    cells = cells[:columns * rows]
+    return cells + [None] * (columns * rows - len(cells))
+
+def _write_cells_file(output_path, columns, rows, frame_width, frame_height, image_mode, cells):
+    if cells is None or os.path.splitext(output_path)[1].lower() not in INCREMENTAL_FORMATS:
+        _remove_cells_file(output_path)
+        return
+    cells_path = _cells_file_path(output_path)
+    try:
+        st = os.stat(output_path)
+        tmp_path = f"{cells_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"columns": columns, "rows": rows, "frame_width": frame_width,
+                       "frame_height": frame_height, "image_mode": image_mode,
+                       "output": [st.st_mtime_ns, st.st_size], "cells": cells}, f)
+        os.replace(tmp_path, cells_path)
+    except OSError:
+        pass
+
+# 任何不经过帧缓存写出 output_path 的路径 (普通合并、流式、图集) 都需要先删除旧记录
+def _remove_cells_file(output_path):
+    try:
+        os.remove(_cells_file_path(output_path))
+    except OSError:
+        pass
+
+
+# --- 核心逻辑函数 (流式合并) ---
+# 按行带逐条组装并写出序列图：峰值内存约为一行帧 (frame_height x 总宽度)，
+# 适合在内存有限的机器上生成超大序列图。目前仅支持输出 PNG。
+def create_sprite_sheet_streaming(input_dir, columns, rows, output_path, status_callback,
+                                  frame_width, frame_height, image_mode,
+                                  sorted_image_files, resize_output,
+                                  workers=1, pool_mode="thread", encode_profile=None,
+                                  compress_workers=1, metrics=None):
+    status_callback(f"开始流式合并: 网格={columns}x{rows}, 单帧={frame_width}x{frame_height}")
+    if metrics is None:
+        metrics = RunMetrics()
+    try:
+        file_count = len(sorted_image_files)
+        if file_count == 0:
+            status_callback("错误：没有找到需要合并的图像文件。")
+            return False
+        if resize_output:
+            status_callback("错误：流式输出无法将整张序列图压缩到单帧大小，请关闭压缩选项或使用普通模式。")
+            return False
+        if os.path.splitext(output_path)[1].lower() != '.png':
+            status_callback(f"错误：流式输出目前只支持 PNG 格式: {output_path}")
+            return False
+        if image_mode not in PNG_COLOR_TYPES:
+            status_callback(f"警告：流式输出不支持图像模式 '{image_mode}'，将使用 'RGBA'。")
+            image_mode = 'RGBA'
+        status_callback(f"使用 {file_count} 个已排序图像文件。")
+
+        total_width = frame_width * columns
+        total_height = frame_height * rows
+        status_callback(f"流式写出序列图: {total_width}x{total_height} (模式: {image_mode})，每次一行")
+
+        max_images = columns * rows
+        processed_count = 0
+        _ensure_output_dir(output_path, status_callback)
+        _remove_cells_file(output_path)
+        _remove_frame_map(output_path)
+        if encode_profile:
+            compress_level = ENCODE_PROFILES[encode_profile]['png']['compress_level']
+            png_filter = ENCODE_PROFILES[encode_profile]['png_filter']
+        else:
+            compress_level, png_filter = 6, 'none'
+        encode_start = time.perf_counter()
+        metrics.begin("frames", min(file_count, max_images))
+        with StreamingPNGWriter(output_path, total_width, total_height, image_mode,
+                                compress_level, png_filter, compress_workers) as writer:
+            band = Image.new(image_mode, (total_width, frame_height))
+            band_row = 0
+            frames = _iter_loaded_frames(input_dir, sorted_image_files[:max_images],
+                                         frame_width, frame_height, image_mode,
+                                         status_callback, workers, pool_mode)
+            for i, filename, img_to_paste in frames:
+                current_row = i // columns
+                while band_row < current_row:
+                    writer.write_rows(band.tobytes())
+                    band = Image.new(image_mode, (total_width, frame_height))
+                    band_row += 1
+                if img_to_paste is None:
+                    metrics.advance(i)
+                    continue
+                try:
+                    band.paste(img_to_paste, ((i % columns) * frame_width, 0))
+                    processed_count += 1
+                except Exception as paste_e:
+                    status_callback(f"错误：处理或粘贴图像 {filename} 时出错: {paste_e}，已跳过。")
+                metrics.advance(i, _frame_bytes(img_to_paste))
+            # 剩余的行带与 zlib 收尾计入保存阶段
+            metrics.begin("save")
+            writer.write_rows(band.tobytes())
+            band_row += 1
+            # 剩余的空白行
+            if band_row < rows:
+                blank = bytes(writer.row_bytes * frame_height)
+                for _ in range(band_row, rows):
+                    writer.write_rows(blank)
+        if file_count > max_images:
+            status_callback(f"信息：图像数量 ({file_count}) 超出网格容量 ({max_images})，已停止处理多余帧。")
+
+        byte_count = os.path.getsize(output_path)
+        metrics.add_bytes(byte_count)
+        metrics.end()
+        status_callback(f"已处理 {processed_count} 张图像。")
+        # 流式模式下解码与编码交错进行，耗时为整个组装+写出过程
+        report_encode(status_callback, encode_profile, output_path,
+                      time.perf_counter() - encode_start, byte_count)
+        status_callback(f"成功！序列图已保存至: {output_path}")
+        return True
+
+    except Exception as e:
+        status_callback(f"合并核心逻辑时发生未预料的错误: {e}")
+        _write_core_error_log("create_sprite_sheet_streaming", status_callback)
+        return False
+
+
+# --- 辅助函数 (创建输出目录) ---
+def _ensure_output_dir(output_path, status_callback):
+    output_dir = os.path.dirname(output_path)
+    if output_dir and not os.path.exists(output_dir):
+         os.makedirs(output_dir)
+         status_callback(f"已创建输出目录: {output_dir}")
+
+# --- 辅助函数 (记录核心逻辑错误日志) ---
+def _write_core_error_log(func_name, status_callback):
+    try:
+        with open("core_logic_error.log", "w", encoding='utf-8') as f:
+            f.write(f"{func_name} 错误:\n{traceback.format_exc()}")
+        status_callback("错误详情已记录到 core_logic_error.log")
+    except Exception as log_e:
+         status_callback(f"写入核心逻辑错误日志失败: {log_e}")
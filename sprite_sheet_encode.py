@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# 输出编码配置：fast / balanced / smallest 三档，分别控制 PNG 的 zlib 压缩级别与
+# 扫描行滤波、WebP 无损压缩力度以及 JPEG 的 Huffman 优化与渐进式编码 (各档 JPEG 质量相同，
+# 选择更快的档位不会降低画质)；可选调色板量化。
+# 每次保存都会报告编码用时与输出字节数，便于按资源类别选择合适的档位。
+import os
+import time
+import tempfile
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# 各档位共用的 JPEG 质量
+JPEG_QUALITY = 90
+
+# png_filter 仅用于流式 PNG 写出 (Pillow 的 PNG 编码器自行选择滤波)
+ENCODE_PROFILES = {
+    'fast': {
+        'png': {'compress_level': 1},
+        'png_filter': 'none',
+        'webp': {'lossless': True, 'method': 0, 'quality': 0},
+        'jpeg': {'quality': JPEG_QUALITY},
+    },
+    'balanced': {
+        'png': {'compress_level': 6},
+        'png_filter': 'up',
+        'webp': {'lossless': True, 'method': 4, 'quality': 80},
+        'jpeg': {'quality': JPEG_QUALITY, 'optimize': True},
+    },
+    'smallest': {
+        'png': {'compress_level': 9, 'optimize': True},
+        'png_filter': 'up',
+        # 无损 WebP 在 method=6 且 quality=100 时会穷举压缩参数，耗时增加数十倍而体积几乎不变；
+        # method=5 不会穷举，quality=100 时仍比 balanced 多做几轮压缩。
+        # 噪声一类几乎不可压缩的内容在各档位下可能得到完全相同的 WebP 文件
+        'webp': {'lossless': True, 'method': 5, 'quality': 100},
+        'jpeg': {'quality': JPEG_QUALITY, 'optimize': True, 'progressive': True},
+    },
+}
+
+_FORMAT_BY_EXTENSION = {'.png': 'png', '.webp': 'webp', '.jpg': 'jpeg', '.jpeg': 'jpeg'}
+
+
+def output_format(output_path):
+    return _FORMAT_BY_EXTENSION.get(os.path.splitext(output_path)[1].lower())
+
+
+# 返回指定档位下保存 output_path 所用的 Pillow 参数；profile 为 None 时使用 Pillow 默认值
+def save_options(output_path, profile):
+    if profile is None:
+        return {}
+    if profile not in ENCODE_PROFILES:
+        raise ValueError(f"未知的编码配置 '{profile}'，可选: {', '.join(ENCODE_PROFILES)}")
+    fmt = output_format(output_path)
+    return dict(ENCODE_PROFILES[profile].get(fmt, {})) if fmt else {}
+
+
+# --- 调色板量化 ---
+# RGBA 只能用 FASTOCTREE 量化；量化后的图像为 P 模式，适合颜色有限的像素风序列图
+def quantize_image(image, colors=256):
+    if image.mode == 'P':
+        return image
+    if image.mode in ('RGBA', 'LA'):
+        return image.convert('RGBA').quantize(colors, method=Image.Quantize.FASTOCTREE)
+    return image.convert('RGB').quantize(colors, method=Image.Quantize.MEDIANCUT)
+
+
+def _format_bytes(byte_count):
+    return f"{byte_count:,} 字节 ({byte_count / (1024 * 1024):.2f} MB)"
+
+
+def report_encode(status_callback, profile, output_path, elapsed, byte_count):
+    fmt = (output_format(output_path) or os.path.splitext(output_path)[1].lstrip('.') or '?').upper()
+    status_callback(f"编码完成: 配置={profile or '默认'}, 格式={fmt}, 用时 {elapsed:.2f}s, 大小 {_format_bytes(byte_count)}")
+
+
+# --- 按档位保存图像并报告耗时与大小 ---
+# atomic 为真时先写入同目录下的临时文件再替换目标，读取方不会看到写了一半的文件。
+# 返回 (编码耗时秒数, 输出字节数)
+def save_image(image, output_path, status_callback, profile=None, quantize=False, atomic=False):
+    start = time.perf_counter()
+    if quantize:
+        if output_format(output_path) == 'jpeg':
+            status_callback("警告：JPEG 不支持调色板，已忽略量化选项。")
+        else:
+            image = quantize_image(image)
+    if atomic:
+        base, ext = os.path.splitext(output_path)
+        tmp_path = f"{base}.{os.getpid()}.tmp{ext}"
+        try:
+            image.save(tmp_path, **save_options(output_path, profile))
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    else:
+        image.save(output_path, **save_options(output_path, profile))
+    elapsed = time.perf_counter() - start
+    byte_count = os.path.getsize(output_path)
+    report_encode(status_callback, profile, output_path, elapsed, byte_count)
+    return elapsed, byte_count
+
+
+# --- 比较各档位 ---
+# 把同一张序列图按每个档位编码到临时文件，返回 [(档位, 格式, 耗时, 字节数)]
+def compare_encode_profiles(image_path, formats=('png', 'webp'), quantize=False):
+    results = []
+    with Image.open(image_path) as img:
+        img.load()
+        if quantize:
+            img = quantize_image(img)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for fmt in formats:
+                ext = '.jpg' if fmt == 'jpeg' else '.' + fmt
+                source = img.convert('RGB') if fmt == 'jpeg' and img.mode not in ('RGB', 'L') else img
+                for profile in ENCODE_PROFILES:
+                    path = os.path.join(tmp_dir, profile + ext)
+                    start = time.perf_counter()
+                    source.save(path, **save_options(path, profile))
+                    results.append((profile, fmt, time.perf_counter() - start, os.path.getsize(path)))
+    return results
@@ -1,22 +1,28 @@
 # -*- coding: utf-8 -*-
 import os
-import re
 import tkinter as tk
 from tkinter import ttk
 from tkinter import filedialog, messagebox, scrolledtext
 import threading
-import math
+import multiprocessing
+import importlib.util
 import sys
 import traceback
 
-# Pillow import
-try:
-    from PIL import Image, ImageFile, ImageTk
-    PIL_AVAILABLE = True
-except ImportError:
-    Image = None
-    ImageTk = None
-    PIL_AVAILABLE = False
+# Pillow 与图像处理模块 (sprite_sheet_core 等) 在首次使用时才导入，启动时只检查 Pillow 是否已安装，
+# 窗口显示后再在后台线程预先加载，避免拖慢打包程序的冷启动
+PIL_AVAILABLE = importlib.util.find_spec("PIL") is not None
+
+from sprite_sheet_progress import PHASE_LABELS, RunMetrics, eta_seconds, write_timing_log
+
+# 单帧尺寸规则的界面显示名称
+FRAME_SIZE_RULE_LABELS = {"首帧": "first", "最大": "max", "最常见": "mode"}
+# 后台线程的状态信息与进度先缓存，每隔该毫秒数合并刷新一次界面，避免逐帧占用 Tk 事件循环
+STATUS_FLUSH_MS = 100
+# 每次运行的分阶段耗时统计 (JSON Lines)
+TIMING_LOG_FILE = "sprite_sheet_timing.jsonl"
+# 窗口显示后延迟该毫秒数再在后台预加载图像处理模块
+BACKEND_PRELOAD_DELAY_MS = 200
 
 # --- 辅助函数 ---
 def resource_path(relative_path):
@@ -26,109 +32,12 @@ def resource_path(relative_path):
         base_path = os.path.abspath(os.path.dirname(__file__))
     return os.path.join(base_path, relative_path)
 
-# --- 核心逻辑函数 (自然排序) ---
-def natural_sort_key(s):
-    return [int(text) if text.isdigit() else text.lower()
-            for text in re.split('([0-9]+)', s)]
-
-# --- 核心逻辑函数 (图像合并) ---
-def create_sprite_sheet(input_dir, columns, rows, output_path, status_callback,
-                        frame_width, frame_height, image_mode,
-                        sorted_image_files, resize_output):
-    status_callback(f"开始合并: 网格={columns}x{rows}, 单帧={frame_width}x{frame_height}")
+# 在后台线程中预先导入图像处理模块 (连带 Pillow 与常用编解码插件)，首次合并时无需等待导入
+def preload_backend():
     try:
-        file_count = len(sorted_image_files)
-        if file_count == 0:
-             status_callback("错误：没有找到需要合并的图像文件。")
-             return False
-        status_callback(f"使用 {file_count} 个已排序图像文件。")
-
-        total_width = frame_width * columns
-        total_height = frame_height * rows
-        status_callback(f"创建序列图画布: {total_width}x{total_height} (模式: {image_mode})")
-
-        try:
-            sprite_sheet = Image.new(image_mode, (total_width, total_height))
-        except ValueError as ve:
-            status_callback(f"警告：图像模式 '{image_mode}' 无效 ({ve})，尝试使用 'RGBA'。")
-            try:
-                image_mode = 'RGBA'
-                sprite_sheet = Image.new(image_mode, (total_width, total_height))
-            except Exception as fallback_e:
-                 status_callback(f"错误：无法创建图像画布: {fallback_e}")
-                 return False
-
-        max_images = columns * rows
-        processed_count = 0
-        for i, filename in enumerate(sorted_image_files):
-            if i >= max_images:
-                status_callback(f"信息：图像数量 ({file_count}) 超出网格容量 ({max_images})，已停止处理多余帧。")
-                break
-
-            current_col = i % columns
-            current_row = i // columns
-            paste_x = current_col * frame_width
-            paste_y = current_row * frame_height
-            image_path = os.path.join(input_dir, filename)
-            try:
-                 with Image.open(image_path) as img:
-                     img_to_paste = img
-                     if img.size != (frame_width, frame_height):
-                         status_callback(f"信息：调整图像 {filename} 的尺寸...")
-                         img_to_paste = img.resize((frame_width, frame_height), Image.Resampling.LANCZOS)
-                     if img_to_paste.mode != image_mode:
-                         status_callback(f"信息：转换图像 {filename} 的模式...")
-                         try:
-                            img_to_paste = img_to_paste.convert(image_mode)
-                         except Exception as convert_e:
-                            status_callback(f"警告：转换图像 {filename} 模式失败: {convert_e}。")
-                     sprite_sheet.paste(img_to_paste, (paste_x, paste_y))
-                     processed_count += 1
-            except FileNotFoundError:
-                 status_callback(f"错误：无法找到图像文件 {filename}，已跳过。")
-                 continue
-            except Exception as paste_e:
-                 status_callback(f"错误：处理或粘贴图像 {filename} 时出错: {paste_e}，已跳过。")
-                 continue
-
-        status_callback(f"已处理 {processed_count} 张图像。")
-
-        final_image_to_save = sprite_sheet
-        if resize_output:
-            status_callback(f"检测到压缩选项：正在将图像从 {total_width}x{total_height} 压缩到 {frame_width}x{frame_height}...")
-            try:
-                final_image_to_save = sprite_sheet.resize((frame_width, frame_height), Image.Resampling.LANCZOS)
-                status_callback("压缩完成。")
-            except Exception as resize_e:
-                status_callback(f"错误：压缩图像时出错: {resize_e}。将尝试保存原始大图。")
-                final_image_to_save = sprite_sheet
-
-        try:
-            output_dir = os.path.dirname(output_path)
-            if output_dir and not os.path.exists(output_dir):
-                 os.makedirs(output_dir)
-                 status_callback(f"已创建输出目录: {output_dir}")
-            final_image_to_save.save(output_path)
-            if resize_output and final_image_to_save != sprite_sheet:
-                 status_callback(f"成功！压缩后的序列图已保存至: {output_path}")
-            else:
-                 status_callback(f"成功！序列图已保存至: {output_path}")
-            return True
-        except Exception as save_e:
-            status_callback(f"错误：保存最终序列图到 {output_path} 时失败: {save_e}")
-            return False
-
+        import sprite_sheet_pages, sprite_sheet_watch
     except Exception as e:
-        status_callback(f"合并核心逻辑时发生未预料的错误: {e}")
-        # 保留核心逻辑的日志记录
-        try:
-            with open("core_logic_error.log", "w", encoding='utf-8') as f:
-                f.write(f"create_sprite_sheet 错误:\n{traceback.format_exc()}")
-            status_callback("错误详情已记录到 core_logic_error.log")
-        except Exception as log_e:
-             status_callback(f"写入核心逻辑错误日志失败: {log_e}")
-        return False
-
+        print(f"警告：预加载图像处理模块失败: {e}")
 
 # --- 自定义确认对话框类 ---
 class ConfirmationDialog(tk.Toplevel):
@@ -156,9 +65,10 @@ class SpriteSheetApp:
     def __init__(self, master):
         self.master = master
         master.title("序列图合并工具")
-        master.geometry("600x470")
-        master.minsize(500, 420)
-        self.input_dir = tk.StringVar(); self.output_path = tk.StringVar(); self.columns_var = tk.StringVar(value="10"); self.rows_var = tk.StringVar(value="1"); self.resize_var = tk.BooleanVar(value=False);
+        master.geometry("640x520")
+        master.minsize(500, 470)
+        self._status_lock = threading.Lock(); self._pending_messages = []; self._latest_progress = None; self._flush_scheduled = False; self.progress_var = tk.StringVar(value=""); self._watch = None;
+        self.input_dir = tk.StringVar(); self.output_path = tk.StringVar(); self.columns_var = tk.StringVar(value="10"); self.rows_var = tk.StringVar(value="1"); self.resize_var = tk.BooleanVar(value=False); self.cache_var = tk.BooleanVar(value=False); self.frame_size_var = tk.StringVar(value="首帧");
         try:
             style = ttk.Style(); available_themes = style.theme_names(); preferred_themes = ['vista', 'xpnative', 'clam', 'alt', 'default'];
             for theme in preferred_themes:
@@ -170,11 +80,12 @@ class SpriteSheetApp:
         try:
             main_frame = ttk.Frame(master, padding="10 10 10 10"); main_frame.pack(fill=tk.BOTH, expand=True); main_frame.columnconfigure(1, weight=1);
             ttk.Label(main_frame, text="输入帧目录:").grid(row=0, column=0, sticky=tk.W); self.input_entry = ttk.Entry(main_frame, textvariable=self.input_dir, width=50, state='readonly'); self.input_entry.grid(row=0, column=1, sticky=tk.EW, padx=(0, 5)); self.input_button = ttk.Button(main_frame, text="选择...", command=self.select_input_dir); self.input_button.grid(row=0, column=2, sticky=tk.E);
-            options_frame = ttk.Frame(main_frame); options_frame.grid(row=1, column=0, columnspan=3, sticky=tk.W, pady=5); ttk.Label(options_frame, text="列数:").pack(side=tk.LEFT, padx=(0, 5)); self.columns_entry = ttk.Entry(options_frame, textvariable=self.columns_var, width=5); self.columns_entry.pack(side=tk.LEFT, padx=(0, 15)); ttk.Label(options_frame, text="行数:").pack(side=tk.LEFT, padx=(0, 5)); self.rows_entry = ttk.Entry(options_frame, textvariable=self.rows_var, width=5); self.rows_entry.pack(side=tk.LEFT);
+            options_frame = ttk.Frame(main_frame); options_frame.grid(row=1, column=0, columnspan=3, sticky=tk.W, pady=5); ttk.Label(options_frame, text="列数:").pack(side=tk.LEFT, padx=(0, 5)); self.columns_entry = ttk.Entry(options_frame, textvariable=self.columns_var, width=5); self.columns_entry.pack(side=tk.LEFT, padx=(0, 15)); ttk.Label(options_frame, text="行数:").pack(side=tk.LEFT, padx=(0, 5)); self.rows_entry = ttk.Entry(options_frame, textvariable=self.rows_var, width=5); self.rows_entry.pack(side=tk.LEFT, padx=(0, 15)); ttk.Label(options_frame, text="单帧尺寸:").pack(side=tk.LEFT, padx=(0, 5)); self.frame_size_combo = ttk.Combobox(options_frame, textvariable=self.frame_size_var, values=list(FRAME_SIZE_RULE_LABELS), width=6, state='readonly'); self.frame_size_combo.pack(side=tk.LEFT); self.cache_check = ttk.Checkbutton(options_frame, text="增量更新 (缓存已处理的帧)", variable=self.cache_var, onvalue=True, offvalue=False); self.cache_check.pack(side=tk.LEFT, padx=(15, 0));
             self.resize_check = ttk.Checkbutton(main_frame, text="将最终输出压缩到单帧大小 (可能降低质量)", variable=self.resize_var, onvalue=True, offvalue=False); self.resize_check.grid(row=2, column=0, columnspan=3, sticky=tk.W, pady=(5, 0));
             ttk.Label(main_frame, text="输出文件路径:").grid(row=3, column=0, sticky=tk.W); self.output_entry = ttk.Entry(main_frame, textvariable=self.output_path, width=50, state='readonly'); self.output_entry.grid(row=3, column=1, sticky=tk.EW, padx=(0, 5)); self.output_button = ttk.Button(main_frame, text="保存为...", command=self.select_output_file); self.output_button.grid(row=3, column=2, sticky=tk.E);
-            self.run_button = ttk.Button(main_frame, text="开始合并", command=self.start_processing); self.run_button.grid(row=4, column=0, columnspan=3, pady=15);
+            button_frame = ttk.Frame(main_frame); button_frame.grid(row=4, column=0, columnspan=3, pady=15); self.run_button = ttk.Button(button_frame, text="开始合并", command=self.start_processing); self.run_button.pack(side=tk.LEFT, padx=5); self.watch_button = ttk.Button(button_frame, text="监视目录", command=self.toggle_watch); self.watch_button.pack(side=tk.LEFT, padx=5);
             ttk.Label(main_frame, text="状态信息:").grid(row=5, column=0, sticky=tk.W); self.status_text = scrolledtext.ScrolledText(main_frame, height=10, wrap=tk.WORD, state='disabled'); self.status_text.grid(row=6, column=0, columnspan=3, sticky="nsew", pady=(5, 0)); main_frame.rowconfigure(6, weight=1);
+            self.progress_bar = ttk.Progressbar(main_frame, mode='determinate', maximum=1); self.progress_bar.grid(row=7, column=0, columnspan=3, sticky=tk.EW, pady=(5, 0)); ttk.Label(main_frame, textvariable=self.progress_var).grid(row=8, column=0, columnspan=3, sticky=tk.W);
         except Exception as e: # <--- 这是捕获控件创建错误的 except 块
             # ---> except 块内部的代码需要缩进 <---
             messagebox.showerror("初始化错误", f"创建界面时发生严重错误:\n{e}")
@@ -190,19 +101,54 @@ class SpriteSheetApp:
         if directory:
             self.input_dir.set(directory);
             if not self.output_path.get():
-                base = os.path.basename(directory); safe_base = "".join(c for c in base if c.isalnum() or c in ('_', '-')).rstrip();
-                if not safe_base: safe_base = "output";
-                suggested_out = os.path.join(os.path.dirname(directory), f"{safe_base}_spritesheet.png"); self.output_path.set(suggested_out)
+                from sprite_sheet_core import suggest_output_path
+                self.output_path.set(suggest_output_path(directory))
 
     def select_output_file(self):
         initial_dir = os.path.dirname(self.input_dir.get()) if self.input_dir.get() else "."; initial_file = os.path.basename(self.output_path.get()) if self.output_path.get() else "spritesheet.png";
-        filepath = filedialog.asksaveasfilename(title="选择序列图保存位置和名称", initialdir=initial_dir, initialfile=initial_file, defaultextension=".png", filetypes=[("PNG 文件", "*.png"), ("JPEG 文件", "*.jpg;*.jpeg"), ("BMP 文件", "*.bmp"), ("所有文件", "*.*")]);
+        filepath = filedialog.asksaveasfilename(title="选择序列图保存位置和名称", initialdir=initial_dir, initialfile=initial_file, defaultextension=".png", filetypes=[("PNG 文件", "*.png"), ("WebP 文件", "*.webp"), ("JPEG 文件", "*.jpg;*.jpeg"), ("BMP 文件", "*.bmp"), ("所有文件", "*.*")]);
         if filepath: self.output_path.set(filepath)
 
     def update_status(self, message):
-        if self.master and hasattr(self, 'status_text') and self.status_text: self.master.after(0, self._update_status_ui, message)
+        if self.master and hasattr(self, 'status_text') and self.status_text:
+            with self._status_lock: self._pending_messages.append(message)
+            self._schedule_flush()
         else: print(f"STATUS (window closed?): {message}")
 
+    # 进度事件只保留最新的一个，由定时刷新统一更新进度条
+    def on_progress(self, event):
+        with self._status_lock: self._latest_progress = event
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        with self._status_lock:
+            if self._flush_scheduled: return
+            self._flush_scheduled = True
+        try: self.master.after(STATUS_FLUSH_MS, self._flush_status)
+        except Exception as e: print(f"警告：安排状态刷新时出错: {e}")
+
+    def _flush_status(self):
+        with self._status_lock:
+            messages = self._pending_messages; event = self._latest_progress
+            self._pending_messages = []; self._latest_progress = None; self._flush_scheduled = False
+        if messages: self._update_status_ui("\n".join(messages))
+        if event is not None: self._update_progress_ui(event)
+
+    def _update_progress_ui(self, event):
+        try:
+            label = PHASE_LABELS.get(event.phase, event.phase)
+            if event.total:
+                self.progress_bar.config(maximum=event.total, value=event.done); text = f"{label}: {event.done}/{event.total}"
+                eta = eta_seconds(event)
+                if eta is not None and event.done < event.total: text += f"，预计剩余 {eta:.0f} 秒"
+            else: text = f"{label}: {event.done}"
+            self.progress_var.set(text)
+        except Exception as e: print(f"警告：更新进度条时出错: {e}")
+
+    def _reset_progress_ui(self, text=""):
+        try: self.progress_bar.config(maximum=1, value=0); self.progress_var.set(text)
+        except Exception as e: print(f"警告：重置进度条时出错: {e}")
+
     def _update_status_ui(self, message):
         try: self.status_text.config(state='normal'); self.status_text.insert(tk.END, message + "\n"); self.status_text.see(tk.END); self.status_text.config(state='disabled')
         except Exception as e: print(f"警告：更新状态文本时出错: {e}")
@@ -215,14 +161,20 @@ class SpriteSheetApp:
             if hasattr(self, 'columns_entry'): self.columns_entry.config(state=readonly_state)
             if hasattr(self, 'rows_entry'): self.rows_entry.config(state=readonly_state)
             if hasattr(self, 'run_button'): self.run_button.config(state=state)
+            if hasattr(self, 'watch_button'): self.watch_button.config(state=state)
             if hasattr(self, 'resize_check'): self.resize_check.config(state=state)
+            if hasattr(self, 'cache_check'): self.cache_check.config(state=state)
+            if hasattr(self, 'frame_size_combo'): self.frame_size_combo.config(state='readonly' if enabled else tk.DISABLED)
         except Exception as e: print(f"警告：切换控件状态时出错: {e}")
 
     def start_processing(self):
-        in_dir = self.input_dir.get(); out_path = self.output_path.get(); cols_str = self.columns_var.get(); rows_str = self.rows_var.get(); should_resize_output = self.resize_var.get();
+        in_dir = self.input_dir.get(); out_path = self.output_path.get(); cols_str = self.columns_var.get(); rows_str = self.rows_var.get(); should_resize_output = self.resize_var.get(); use_cache = self.cache_var.get(); frame_size_rule = FRAME_SIZE_RULE_LABELS.get(self.frame_size_var.get(), "first");
         if not PIL_AVAILABLE: messagebox.showerror("错误", "缺少 Pillow 库，无法进行图像处理。\n请安装 Pillow (pip install Pillow)。"); return
         if not in_dir or not os.path.isdir(in_dir): messagebox.showerror("错误", f"请选择一个有效的输入帧目录！\n当前路径: '{in_dir}'"); return
         if not out_path: messagebox.showerror("错误", "请指定输出文件路径！"); return
+        from sprite_sheet_core import MAX_DIMENSION, recommend_grid
+        from sprite_sheet_pages import DEFAULT_MAX_TEXTURE_SIZE
+        from sprite_sheet_scan import prescan_directory, choose_frame_size
 
         # --- 行列数转换与验证 ---
         try:
@@ -237,25 +189,20 @@ class SpriteSheetApp:
 
         # --- 扫描文件并获取首帧信息 ---
         frame_width, frame_height, image_mode = None, None, None; sorted_image_files = []; file_count = 0
+        metrics = RunMetrics(self.on_progress); metrics.info.update({"command": "gui", "input": os.path.abspath(in_dir), "output": os.path.abspath(out_path)})
         try:
             self.update_status(f"正在扫描目录: {in_dir}")
-            all_files = [f for f in os.listdir(in_dir) if os.path.isfile(os.path.join(in_dir, f))]
-            image_extensions = {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff'}
-            image_files = [f for f in all_files if os.path.splitext(f)[1].lower() in image_extensions]
-            if not image_files:
+            metrics.begin("scan"); scan = prescan_directory(in_dir); metrics.end()
+            sorted_image_files = scan.files
+            if not sorted_image_files:
                 messagebox.showwarning("警告", f"在输入目录 '{in_dir}' 中未找到任何支持的图像文件。")
                 return
-            image_files.sort(key=natural_sort_key)
-            sorted_image_files = image_files
             file_count = len(sorted_image_files)
             self.update_status(f"找到 {file_count} 个图像文件。已排序。")
+            self.update_status(f"预扫描完成 (缓存命中 {scan.cached_count} 个，用时 {scan.elapsed * 1000:.0f} ms)：{scan.describe()}")
 
-            first_image_path = os.path.join(in_dir, sorted_image_files[0])
-            with Image.open(first_image_path) as first_img:
-                frame_width, frame_height = first_img.size
-                image_mode = first_img.mode
-                if not frame_width or not frame_height or frame_width <= 0 or frame_height <= 0:
-                    raise ValueError(f"从 {sorted_image_files[0]} 获取的帧尺寸无效: {frame_width}x{frame_height}")
+            frame_width, frame_height, image_mode = choose_frame_size(scan, frame_size_rule)
+            self.update_status(f"单帧尺寸: {frame_width}x{frame_height} {image_mode}")
 
         except FileNotFoundError:
              messagebox.showerror("错误", f"输入目录未找到: {in_dir}")
@@ -284,7 +231,7 @@ class SpriteSheetApp:
 
         grid_capacity = original_cols * original_rows; current_cols, current_rows = original_cols, original_rows; recommended_cols, recommended_rows = original_cols, original_rows
         if file_count != grid_capacity:
-            recommended_cols = math.ceil(math.sqrt(file_count)); recommended_rows = math.ceil(file_count / recommended_cols);
+            recommended_cols, recommended_rows = recommend_grid(file_count)
             if file_count > grid_capacity: title = "警告：可能丢失帧"; message = (f"找到 {file_count} 个图像文件，但当前设置 ({original_cols}x{original_rows}) 只能容纳 {grid_capacity} 个。\n\n如果使用当前设置，后面的 **{file_count - grid_capacity}** 个序列帧将被丢失。\n\n建议设置为 {recommended_cols}x{recommended_rows} 以包含所有文件。\n\n请选择操作：")
             else: title = "警告：可能产生空白帧"; message = (f"找到 {file_count} 个图像文件，但当前设置 ({original_cols}x{original_rows}) 容量为 {grid_capacity}。\n\n如果使用当前设置，将在序列图末尾产生 **{grid_capacity - file_count}** 个空白帧。\n\n建议设置为 {recommended_cols}x{recommended_rows} 以正好匹配文件数。\n\n请选择操作：")
             dialog = ConfirmationDialog(self.master, title=title, message=message, file_count=file_count, original_settings=(original_cols, original_rows), recommended_settings=(recommended_cols, recommended_rows))
@@ -294,28 +241,76 @@ class SpriteSheetApp:
 
         try:
             if not frame_width or not frame_height or frame_width <= 0 or frame_height <= 0: raise ValueError("单帧尺寸无效")
-            final_total_width = frame_width * current_cols; final_total_height = frame_height * current_rows; MAX_DIMENSION = 16384; proceed_large = True
+            final_total_width = frame_width * current_cols; final_total_height = frame_height * current_rows; proceed_large = True; paged_output = False
             if final_total_width > MAX_DIMENSION or final_total_height > MAX_DIMENSION:
-                rec_cols_check = math.ceil(math.sqrt(file_count)); rec_rows_check = math.ceil(file_count / rec_cols_check);
+                rec_cols_check, rec_rows_check = recommend_grid(file_count)
                 recommended_width_approx = frame_width * rec_cols_check; recommended_height_approx = frame_height * rec_rows_check
-                warn_message = (f"警告：计算出的最终序列图尺寸为 {final_total_width}x{final_total_height} 像素，这非常大！\n\n创建如此大的图像可能会消耗大量内存和处理时间，甚至可能导致程序或系统不稳定。\n\n（基于文件数量 {file_count} 的建议尺寸约为 {recommended_width_approx}x{recommended_height_approx}）\n\n确定要继续创建这个超大图像吗？")
-                proceed_large = messagebox.askyesno("确认创建超大图像", warn_message, icon='warning')
+                warn_message = (f"警告：计算出的最终序列图尺寸为 {final_total_width}x{final_total_height} 像素，这非常大！\n\n创建如此大的图像可能会消耗大量内存和处理时间，甚至可能导致程序或系统不稳定。\n\n（基于文件数量 {file_count} 的建议尺寸约为 {recommended_width_approx}x{recommended_height_approx}）\n\n选择“是”：自动分页输出，每页不超过 {DEFAULT_MAX_TEXTURE_SIZE}x{DEFAULT_MAX_TEXTURE_SIZE}，并生成帧索引文件。\n选择“否”：仍然创建这个超大图像。")
+                answer = messagebox.askyesnocancel("确认创建超大图像", warn_message, icon='warning')
+                proceed_large = answer is not None; paged_output = bool(answer)
             if not proceed_large: self.update_status("操作已取消（因图像尺寸过大）。"); return
         except Exception as size_calc_e: messagebox.showerror("错误", f"计算最终图像尺寸时出错:\n{size_calc_e}"); return
 
-        try: self.status_text.config(state='normal'); self.status_text.delete('1.0', tk.END); self.status_text.config(state='disabled'); self._toggle_controls(False)
+        try: self.status_text.config(state='normal'); self.status_text.delete('1.0', tk.END); self.status_text.config(state='disabled'); self._reset_progress_ui("准备中..."); self._toggle_controls(False)
         except Exception as ui_e: print(f"警告：准备启动线程时更新UI出错: {ui_e}")
 
-        thread = threading.Thread(target=self.run_sprite_sheet_task, args=(in_dir, current_cols, current_rows, out_path, frame_width, frame_height, image_mode, sorted_image_files, should_resize_output), daemon=True); thread.start()
+        # 总耗时不计入等待确认对话框的时间 (保留扫描阶段的统计)
+        metrics.restart(); thread = threading.Thread(target=self.run_sprite_sheet_task, args=(in_dir, current_cols, current_rows, out_path, frame_width, frame_height, image_mode, sorted_image_files, should_resize_output, use_cache, paged_output, metrics), daemon=True); thread.start()
+
+    # --- 监视模式：帧文件变化后自动增量更新序列图 ---
+    def toggle_watch(self):
+        if self._watch is not None:
+            _, stop_event = self._watch; stop_event.set(); self.watch_button.config(state=tk.DISABLED); self.master.after(100, self._wait_watch_stopped); return
+        in_dir = self.input_dir.get(); out_path = self.output_path.get(); cols_str = self.columns_var.get(); frame_size_rule = FRAME_SIZE_RULE_LABELS.get(self.frame_size_var.get(), "first");
+        if not PIL_AVAILABLE: messagebox.showerror("错误", "缺少 Pillow 库，无法进行图像处理。\n请安装 Pillow (pip install Pillow)。"); return
+        if not in_dir or not os.path.isdir(in_dir): messagebox.showerror("错误", f"请选择一个有效的输入帧目录！\n当前路径: '{in_dir}'"); return
+        if not out_path: messagebox.showerror("错误", "请指定输出文件路径！"); return
+        try:
+            columns = int(cols_str)
+            if columns <= 0: raise ValueError("列数必须是正整数")
+        except ValueError as ve: messagebox.showerror("错误", f"列数必须是有效的正整数！\n当前值: 列='{cols_str}'\n({ve})"); return
+        from sprite_sheet_core import DEFAULT_DECODE_WORKERS
+        from sprite_sheet_watch import SheetWatcher, start_watch_thread
+        try: watcher = SheetWatcher(in_dir, out_path, self.update_status, columns=columns, frame_size_rule=frame_size_rule, workers=DEFAULT_DECODE_WORKERS)
+        except Exception as cache_e: messagebox.showerror("错误", f"无法初始化帧缓存，不能启动监视:\n{cache_e}"); return
+        try: self.status_text.config(state='normal'); self.status_text.delete('1.0', tk.END); self.status_text.config(state='disabled'); self._reset_progress_ui("监视中...")
+        except Exception as ui_e: print(f"警告：启动监视时更新UI出错: {ui_e}")
+        self.update_status(f"监视模式：列数固定为 {columns}，行数随帧数自动调整；保存帧后序列图会自动更新。")
+        self._watch = start_watch_thread(watcher); self._toggle_controls(False); self.watch_button.config(text="停止监视", state=tk.NORMAL)
+
+    def _wait_watch_stopped(self):
+        thread, _ = self._watch
+        if thread.is_alive(): self.master.after(100, self._wait_watch_stopped); return
+        self._watch = None; self._flush_status(); self._reset_progress_ui(); self._toggle_controls(True); self.watch_button.config(text="监视目录")
 
     # --- run_sprite_sheet_task (简化日志记录) ---
     def run_sprite_sheet_task(self, in_dir, cols, rows, out_path,
                               frame_width, frame_height, image_mode, sorted_image_files,
-                              resize_output):
+                              resize_output, use_cache=False, paged_output=False, metrics=None):
+        if metrics is None: metrics = RunMetrics(self.on_progress)
         try:
+            from sprite_sheet_cache import FrameCache
+            from sprite_sheet_core import DEFAULT_DECODE_WORKERS, create_sprite_sheet
+            from sprite_sheet_pages import create_paged_sprite_sheets
+            if paged_output:
+                if resize_output: self.update_status("信息：分页输出时忽略“压缩到单帧大小”选项。")
+                success = create_paged_sprite_sheets(in_dir, cols, out_path, self.update_status,
+                                                     frame_width, frame_height, image_mode,
+                                                     sorted_image_files[:cols * rows], metrics=metrics)
+                self._record_timing(metrics, success)
+                self.master.after(0, self.on_processing_complete, success)
+                return
+            cache = None
+            if use_cache:
+                try:
+                    cache = FrameCache()
+                except Exception as cache_e:
+                    self.update_status(f"警告：无法初始化帧缓存，将完整重建: {cache_e}")
             success = create_sprite_sheet(in_dir, cols, rows, out_path, self.update_status,
                                           frame_width, frame_height, image_mode, sorted_image_files,
-                                          resize_output)
+                                          resize_output, workers=DEFAULT_DECODE_WORKERS, cache=cache,
+                                          metrics=metrics)
+            self._record_timing(metrics, success)
             self.master.after(0, self.on_processing_complete, success)
         except Exception as e:
             # 线程中的错误仍然重要，保留基本信息和可选日志
@@ -328,11 +323,23 @@ class SpriteSheetApp:
                 self.update_status("详细错误信息已记录到 thread_error.log")
             except Exception as log_e:
                 self.update_status(f"写入线程错误日志失败: {log_e}")
+            # 失败的运行同样追加耗时记录
+            self._record_timing(metrics, False)
             # 必须调用 on_processing_complete 来恢复UI
             self.master.after(0, self.on_processing_complete, False)
 
+    # --- 输出本次运行的耗时统计并追加到 JSON 日志 ---
+    def _record_timing(self, metrics, success):
+        metrics.info["success"] = success
+        self.update_status(metrics.describe())
+        try: write_timing_log(TIMING_LOG_FILE, metrics.summary())
+        except Exception as log_e: self.update_status(f"警告：写入耗时日志 {TIMING_LOG_FILE} 失败: {log_e}")
+
     # --- on_processing_complete (清理版) ---
     def on_processing_complete(self, success):
+        # 先把尚未刷新的状态信息显示出来，再弹出结果对话框
+        self._flush_status()
+        self._reset_progress_ui("完成" if success else "失败")
         self._toggle_controls(True)
         if success:
             messagebox.showinfo("完成", "序列图处理完成！")
@@ -341,6 +348,7 @@ class SpriteSheetApp:
 
 # --- 程序入口 (清理版) ---
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     if not PIL_AVAILABLE:
         try: err_root = tk.Tk(); err_root.withdraw(); messagebox.showerror("依赖错误", "运行此程序需要 Pillow 库。\n请使用 'pip install Pillow' 命令安装。"); err_root.destroy()
         except Exception: pass
@@ -371,6 +379,7 @@ if __name__ == "__main__":
         except: pass
         exit("错误：应用程序初始化失败，程序退出。")
     if app:
+        root.after(BACKEND_PRELOAD_DELAY_MS, lambda: threading.Thread(target=preload_backend, daemon=True).start())
         try:
             root.mainloop()
         except Exception as e:
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# 分页输出：序列图超过目标 GPU 的纹理尺寸上限时，把序列拆成多张不超过上限的页，
+# 各页并行组装与编码 (各页相互独立，可同时占用多个核心压缩)，并输出记录每帧所在页与格子的索引文件
+import os
+import json
+import math
+import concurrent.futures
+
+from sprite_sheet_core import DEFAULT_DECODE_WORKERS, create_sprite_sheet, _ensure_output_dir, _write_core_error_log
+from sprite_sheet_progress import RunMetrics
+
+DEFAULT_MAX_TEXTURE_SIZE = 4096
+# 同时组装的各页画布合计不超过该字节数 (每页持有一整张画布，8192 的 RGBA 页约 256 MB)
+MAX_CONCURRENT_PAGE_BYTES = 1024 * 1024 * 1024
+
+
+# --- 计算分页布局 ---
+# 返回 (每页列数, 每页行数, 每页帧数)；单帧超过上限时抛出 ValueError
+def page_layout(file_count, columns, frame_width, frame_height, max_texture_size):
+    max_cols = max_texture_size // frame_width
+    max_rows = max_texture_size // frame_height
+    if max_cols <= 0 or max_rows <= 0:
+        raise ValueError(f"单帧尺寸 {frame_width}x{frame_height} 超过纹理上限 {max_texture_size}")
+    page_cols = max(1, min(columns, max_cols, file_count))
+    page_rows = max(1, min(max_rows, math.ceil(file_count / page_cols)))
+    return page_cols, page_rows, page_cols * page_rows
+
+
+# --- 同时组装的页数 ---
+# workers 为 None 时与帧解码相同取 DEFAULT_DECODE_WORKERS；再按每页画布大小限制在内存预算内。
+# Pillow 内部 RGB 也按每像素 4 字节存放，故统一按 4 字节估算
+def page_workers(workers, page_count, page_width, page_height):
+    if workers is None:
+        workers = DEFAULT_DECODE_WORKERS
+    memory_limit = max(1, MAX_CONCURRENT_PAGE_BYTES // (page_width * page_height * 4))
+    return max(1, min(workers, memory_limit, page_count))
+
+
+def page_output_path(output_path, page_index):
+    base, ext = os.path.splitext(output_path)
+    return f"{base}_{page_index}{ext}"
+
+
+def pages_index_path(output_path):
+    return os.path.splitext(output_path)[0] + ".pages.json"
+
+
+# 在工作线程/进程中组装单页；状态信息收集后随结果返回，由调用方按页顺序输出
+def _build_page(input_dir, page_cols, page_rows, page_path, frame_width, frame_height,
+                image_mode, page_files, encode_profile=None, quantize=False):
+    messages = []
+    success = create_sprite_sheet(input_dir, page_cols, page_rows, page_path, messages.append,
+                                  frame_width, frame_height, image_mode, page_files, False,
+                                  encode_profile=encode_profile, quantize=quantize)
+    return success, messages
+
+
+# --- 核心逻辑函数 (分页合并) ---
+def create_paged_sprite_sheets(input_dir, columns, output_path, status_callback,
+                               frame_width, frame_height, image_mode, sorted_image_files,
+                               max_texture_size=DEFAULT_MAX_TEXTURE_SIZE, workers=None,
+                               pool_mode="thread", encode_profile=None, quantize=False, metrics=None):
+    if metrics is None:
+        metrics = RunMetrics()
+    try:
+        file_count = len(sorted_image_files)
+        if file_count == 0:
+            status_callback("错误：没有找到需要合并的图像文件。")
+            return False
+        try:
+            page_cols, page_rows, per_page = page_layout(file_count, columns, frame_width,
+                                                         frame_height, max_texture_size)
+        except ValueError as layout_e:
+            status_callback(f"错误：{layout_e}")
+            return False
+        page_count = math.ceil(file_count / per_page)
+        workers = page_workers(workers, page_count, page_cols * frame_width, page_rows * frame_height)
+        status_callback(f"分页输出: {file_count} 帧分为 {page_count} 页，每页最多 {page_cols}x{page_rows} "
+                        f"({page_cols * frame_width}x{page_rows * frame_height}，上限 {max_texture_size})，"
+                        f"同时组装 {workers} 页")
+
+        pages = []
+        for page_index in range(page_count):
+            page_files = sorted_image_files[page_index * per_page:(page_index + 1) * per_page]
+            rows_used = math.ceil(len(page_files) / page_cols)
+            pages.append((page_output_path(output_path, page_index), rows_used, page_files))
+
+        _ensure_output_dir(output_path, status_callback)
+        # 各页在其他线程/进程中组装，进度按页统计
+        metrics.begin("pages", page_count)
+        if pool_mode == "process":
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        else:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        with executor:
+            futures = [executor.submit(_build_page, input_dir, page_cols, rows_used, page_path,
+                                       frame_width, frame_height, image_mode, page_files,
+                                       encode_profile, quantize)
+                       for page_path, rows_used, page_files in pages]
+            results = []
+            for page_index, future in enumerate(futures):
+                success, messages = future.result()
+                for message in messages:
+                    status_callback(f"[第 {page_index + 1}/{page_count} 页] {message}")
+                results.append(success)
+                page_path = pages[page_index][0]
+                metrics.advance(page_index, os.path.getsize(page_path) if success else 0)
+        metrics.end()
+
+        failed_pages = [i for i, success in enumerate(results) if not success]
+        if failed_pages:
+            status_callback(f"错误：第 {', '.join(str(i + 1) for i in failed_pages)} 页生成失败。")
+            return False
+
+        frames = []
+        for page_index, (page_path, rows_used, page_files) in enumerate(pages):
+            for cell, filename in enumerate(page_files):
+                frames.append({"filename": filename, "page": page_index, "cell": cell,
+                               "x": (cell % page_cols) * frame_width,
+                               "y": (cell // page_cols) * frame_height})
+        index_path = pages_index_path(output_path)
+        with open(index_path, "w", encoding="utf-8") as f:
+            json.dump({"frame_width": frame_width, "frame_height": frame_height,
+                       "max_texture_size": max_texture_size,
+                       "pages": [{"image": os.path.basename(page_path), "columns": page_cols, "rows": rows_used}
+                                 for page_path, rows_used, _ in pages],
+                       "frames": frames},
+                      f, ensure_ascii=False, indent=1)
+        status_callback(f"成功！已生成 {page_count} 页序列图，索引文件: {index_path}")
+        return True
+
+    except Exception as e:
+        status_callback(f"分页合并时发生未预料的错误: {e}")
+        _write_core_error_log("create_paged_sprite_sheets", status_callback)
+        return False
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+# 逐行写出 PNG 的流式编码器：调用方每次只需提供若干完整的像素行，
+# 内存占用与一条行带成正比，而不是整张序列图。
+#
+# compress_workers > 1 时各行带在线程池中独立压缩为原始 deflate 片段
+# (zlib 压缩期间释放 GIL)，片段以 Z_SYNC_FLUSH 结尾、字节对齐，按顺序拼接即为
+# 合法的 zlib 数据流；adler32 校验和在主线程中顺序累计。
+import struct
+import zlib
+import importlib.util
+
+from sprite_sheet_pool import OrderedPool
+
+# NumPy 为可选依赖 (仅用于 Up 滤波)，启动时只检查是否已安装，首次滤波时才导入
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+# Pillow 模式 -> (PNG 颜色类型, 每像素字节数)，均为 8 位深度
+PNG_COLOR_TYPES = {
+    'L': (0, 1),
+    'RGB': (2, 3),
+    'LA': (4, 2),
+    'RGBA': (6, 4),
+}
+# 支持的扫描行滤波；'up' 需要 NumPy，缺少时退回 'none'
+PNG_FILTERS = {'none': 0, 'up': 2}
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# 压缩数据累积到该大小后写出一个 IDAT 块
+IDAT_CHUNK_SIZE = 1 << 16
+
+
+def _write_chunk(f, chunk_type, data):
+    f.write(struct.pack('>I', len(data)))
+    f.write(chunk_type)
+    f.write(data)
+    f.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(chunk_type)) & 0xffffffff))
+
+
+def _deflate_strip(data, compress_level):
+    compressor = zlib.compressobj(compress_level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+
+class StreamingPNGWriter:
+    def __init__(self, path, width, height, mode, compress_level=6, png_filter='none',
+                 compress_workers=1):
+        if mode not in PNG_COLOR_TYPES:
+            raise ValueError(f"流式 PNG 不支持图像模式 '{mode}'")
+        if png_filter not in PNG_FILTERS:
+            raise ValueError(f"未知的 PNG 滤波 '{png_filter}'")
+        self.path = path
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.compress_level = compress_level
+        self.png_filter = png_filter if NUMPY_AVAILABLE else 'none'
+        color_type, self.bytes_per_pixel = PNG_COLOR_TYPES[mode]
+        self.row_bytes = width * self.bytes_per_pixel
+        self.rows_written = 0
+        self._previous_row = None
+        self._pending = []
+        self._pending_size = 0
+        if compress_workers > 1:
+            self._compressor = None
+            self._pool = OrderedPool(compress_workers)
+            self._adler = 1
+        else:
+            self._compressor = zlib.compressobj(compress_level)
+            self._pool = None
+        self._file = open(path, 'wb')
+        try:
+            self._file.write(PNG_SIGNATURE)
+            _write_chunk(self._file, b'IHDR',
+                         struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0))
+            if self._pool is not None:
+                # zlib 数据流头 (与 compress_level 对应的 CMF/FLG 两个字节)
+                self._emit(zlib.compress(b'', compress_level)[:2])
+        except Exception:
+            self._shutdown()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._shutdown()
+        return False
+
+    def _filter_rows(self, data, row_count):
+        row_bytes = self.row_bytes
+        filter_type = PNG_FILTERS[self.png_filter]
+        if not NUMPY_AVAILABLE:
+            view = memoryview(data)
+            scanlines = bytearray()
+            for y in range(row_count):
+                scanlines.append(filter_type)
+                scanlines += view[y * row_bytes:(y + 1) * row_bytes]
+            return bytes(scanlines)
+        import numpy
+        rows = numpy.frombuffer(data, dtype=numpy.uint8).reshape(row_count, row_bytes)
+        out = numpy.empty((row_count, row_bytes + 1), dtype=numpy.uint8)
+        out[:, 0] = filter_type
+        if filter_type == PNG_FILTERS['up']:
+            # Up 滤波：每个字节减去上一行同位置的字节 (uint8 自动按 256 取模)
+            previous = self._previous_row
+            if previous is None:
+                out[0, 1:] = rows[0]
+            else:
+                numpy.subtract(rows[0], previous, out=out[0, 1:])
+            numpy.subtract(rows[1:], rows[:-1], out=out[1:, 1:])
+            self._previous_row = rows[-1].copy()
+        else:
+            out[:, 1:] = rows
+        return out.tobytes()
+
+    # data 为若干完整像素行的原始字节 (即 Image.tobytes() 的结果)
+    def write_rows(self, data):
+        row_bytes = self.row_bytes
+        if len(data) % row_bytes:
+            raise ValueError(f"写入的数据长度 {len(data)} 不是行字节数 {row_bytes} 的整数倍")
+        row_count = len(data) // row_bytes
+        if self.rows_written + row_count > self.height:
+            raise ValueError(f"写入的行数超过图像高度 {self.height}")
+        if row_count == 0:
+            return
+        scanlines = self._filter_rows(data, row_count)
+        if self._pool is None:
+            self._emit(self._compressor.compress(scanlines))
+        else:
+            self._adler = zlib.adler32(scanlines, self._adler)
+            for _, strip in self._pool.submit(None, _deflate_strip, scanlines, self.compress_level):
+                self._emit(strip.result())
+        self.rows_written += row_count
+
+    def _emit(self, compressed, force=False):
+        if compressed:
+            self._pending.append(compressed)
+            self._pending_size += len(compressed)
+        if self._pending_size >= IDAT_CHUNK_SIZE or (force and self._pending_size):
+            _write_chunk(self._file, b'IDAT', b''.join(self._pending))
+            self._pending = []
+            self._pending_size = 0
+
+    def _shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self._file.close()
+
+    def close(self):
+        if self._file.closed:
+            return
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(f"只写入了 {self.rows_written}/{self.height} 行")
+            if self._pool is None:
+                self._emit(self._compressor.flush())
+            else:
+                for _, strip in self._pool.drain():
+                    self._emit(strip.result())
+                # 空的最终块 + adler32 校验和
+                final = zlib.compressobj(self.compress_level, zlib.DEFLATED, -zlib.MAX_WBITS)
+                self._emit(final.flush(zlib.Z_FINISH) + struct.pack('>I', self._adler & 0xffffffff))
+            self._emit(b'', force=True)
+            _write_chunk(self._file, b'IEND', b'')
+        finally:
+            self._shutdown()
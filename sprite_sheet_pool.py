@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# 有界的有序工作池：任务结果按提交顺序取回，同时在途的任务数限制为 workers * 2，
+# 避免大量已解码的帧或压缩后的数据同时驻留内存。
+# 帧解码 (sprite_sheet_core)、流式 PNG 行带压缩 (sprite_sheet_png) 与拆分时的帧编码 (sprite_sheet_slice) 共用
+import collections
+import concurrent.futures
+
+# 可选的工作池：线程池 (默认，Pillow/zlib 处理期间释放 GIL) 或进程池 (不受 GIL 限制，参数与结果需跨进程传递)
+POOL_MODES = ('thread', 'process')
+
+
+class OrderedPool:
+    def __init__(self, workers, pool_mode="thread"):
+        if pool_mode == "process":
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        else:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        self.max_in_flight = workers * 2
+        self._pending = collections.deque()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+        return False
+
+    # 提交一个任务；返回因在途任务达到上限而需要先取回的 [(tag, future)]，按提交顺序排列
+    def submit(self, tag, func, *args):
+        self._pending.append((tag, self._executor.submit(func, *args)))
+        ready = []
+        while len(self._pending) >= self.max_in_flight:
+            ready.append(self._pending.popleft())
+        return ready
+
+    # 按提交顺序取回其余的 (tag, future)
+    def drain(self):
+        while self._pending:
+            yield self._pending.popleft()
+
+    # 取消尚未开始的任务并等待进行中的任务结束
+    def shutdown(self):
+        for _, future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(wait=True)
+
+
+# 对 arg_list 中的每组参数并行调用 func，按顺序产出 (序号, future)；
+# 由调用方调用 future.result() 取结果或处理异常。提前停止迭代时取消其余任务
+def ordered_map(func, arg_list, workers, pool_mode="thread"):
+    with OrderedPool(workers, pool_mode) as pool:
+        for i, args in enumerate(arg_list):
+            yield from pool.submit(i, func, *args)
+        yield from pool.drain()
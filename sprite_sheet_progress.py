@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# 结构化的进度与耗时统计：合并流程按阶段 (扫描、帧处理、缩放、保存等) 记录耗时与字节数，
+# 每处理一帧向 progress_callback 发送一个 ProgressEvent，结束后汇总为可写入 JSON 日志的字典。
+# 文字状态信息仍通过 status_callback 输出，两者互不影响。
+import json
+import time
+import collections
+
+# phase: 阶段名；index: 帧/页序号；done/total: 本阶段已完成数与总数 (total 可能为 None)；
+# elapsed_ms: 自运行开始的毫秒数；phase_ms: 自本阶段开始的毫秒数；bytes: 本次处理的字节数
+ProgressEvent = collections.namedtuple("ProgressEvent", "phase index done total elapsed_ms phase_ms bytes")
+
+PHASE_LABELS = {
+    "scan": "扫描",
+    "decode": "解码",
+    "frames": "帧处理",
+    "pack": "排布",
+    "resize": "缩放",
+    "save": "保存",
+    "pages": "分页",
+}
+
+
+# 按已完成比例估算本阶段剩余秒数；无法估算时返回 None
+def eta_seconds(event):
+    if not event.total or not event.done:
+        return None
+    return event.phase_ms / event.done * (event.total - event.done) / 1000
+
+
+class RunMetrics:
+    def __init__(self, progress_callback=None):
+        self.progress_callback = progress_callback
+        self.info = {}
+        # 阶段名 -> {"ms": 耗时, "count": 处理数, "bytes": 字节数}，按首次出现的顺序
+        self.phases = {}
+        self._start = time.perf_counter()
+        self._phase = None
+        self._phase_start = None
+        self._phase_total = None
+
+    # 从现在重新开始计时：已记录的阶段耗时仍计入总耗时，之前阶段之外的空闲时间 (如等待用户确认) 不计入
+    def restart(self):
+        self.end()
+        self._start = time.perf_counter() - sum(stats["ms"] for stats in self.phases.values()) / 1000
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self._start) * 1000
+
+    def begin(self, phase, total=None):
+        self.end()
+        self.phases.setdefault(phase, {"ms": 0.0, "count": 0, "bytes": 0})
+        self._phase = phase
+        self._phase_start = time.perf_counter()
+        self._phase_total = total
+
+    def advance(self, index=None, byte_count=0):
+        stats = self.phases[self._phase]
+        stats["count"] += 1
+        stats["bytes"] += byte_count
+        if self.progress_callback is not None:
+            now = time.perf_counter()
+            self.progress_callback(ProgressEvent(
+                self._phase, index, stats["count"], self._phase_total,
+                (now - self._start) * 1000, (now - self._phase_start) * 1000, byte_count))
+
+    # 记录一个不逐项计数的阶段 (如保存) 的字节数
+    def add_bytes(self, byte_count):
+        self.phases[self._phase]["bytes"] += byte_count
+
+    def end(self):
+        if self._phase is not None:
+            self.phases[self._phase]["ms"] += (time.perf_counter() - self._phase_start) * 1000
+            self._phase = None
+
+    def summary(self):
+        self.end()
+        total_ms = self.elapsed_ms()
+        frames = self.phases.get("frames", {}).get("count", 0)
+        result = dict(self.info)
+        result.update({
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "total_ms": round(total_ms, 1),
+            "frames": frames,
+            "frames_per_second": round(frames / total_ms * 1000, 1) if total_ms and frames else None,
+            "phases": {name: {"ms": round(stats["ms"], 1), "count": stats["count"], "bytes": stats["bytes"]}
+                       for name, stats in self.phases.items()},
+        })
+        return result
+
+    # 形如 "耗时统计: 扫描 12 ms, 帧处理 340 ms, 保存 50 ms, 总计 402 ms (498 帧/秒)"
+    def describe(self):
+        summary = self.summary()
+        parts = [f"{PHASE_LABELS.get(name, name)} {stats['ms']:.0f} ms" for name, stats in summary["phases"].items()]
+        text = f"耗时统计: {', '.join(parts)}, 总计 {summary['total_ms']:.0f} ms"
+        if summary["frames_per_second"]:
+            text += f" ({summary['frames_per_second']:.0f} 帧/秒)"
+        return text
+
+
+# 以 JSON Lines 格式追加一条运行记录 (每行一个 JSON 对象，便于日志采集)
+def write_timing_log(log_path, summary):
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(summary, ensure_ascii=False) + "\n")
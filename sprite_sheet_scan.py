@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# 合并前的预扫描：并行读取所有帧的文件头 (不解码像素)，统计尺寸与模式分布，
+# 并按规则选定单帧尺寸。扫描结果按目录缓存，重复运行时只重新读取有变化的文件。
+import os
+import json
+import time
+import hashlib
+import collections
+import concurrent.futures
+
+from sprite_sheet_cache import DEFAULT_CACHE_DIR
+from sprite_sheet_core import Image, IMAGE_EXTENSIONS, natural_sort_key
+
+# 读取文件头主要耗在 I/O 上 (尤其是网络共享)，线程数可以高于 CPU 核心数
+DEFAULT_SCAN_WORKERS = 16
+DEFAULT_SCAN_CACHE_DIR = os.path.join(DEFAULT_CACHE_DIR, "scan")
+FRAME_SIZE_RULES = ('first', 'max', 'mode')
+
+
+class FrameScan:
+    def __init__(self, input_dir, files, infos, cached_count, elapsed):
+        self.input_dir = input_dir
+        # 按自然排序的文件名列表
+        self.files = files
+        # 文件名 -> (宽, 高, 模式)；无法读取的文件为 None
+        self.infos = infos
+        self.cached_count = cached_count
+        self.elapsed = elapsed
+
+    def histogram(self):
+        return collections.Counter(self.infos[f] for f in self.files)
+
+    def unreadable_files(self):
+        return [f for f in self.files if self.infos[f] is None]
+
+    # 形如 "64x48 RGBA ×35, 80x60 RGB ×5, 无法读取 ×1" 的分布摘要
+    def describe(self):
+        parts = []
+        for info, count in self.histogram().most_common():
+            if info is None:
+                parts.append(f"无法读取 ×{count}")
+            else:
+                parts.append(f"{info[0]}x{info[1]} {info[2]} ×{count}")
+        return ", ".join(parts)
+
+
+def _probe_header(image_path):
+    try:
+        with Image.open(image_path) as img:
+            width, height = img.size
+            if width <= 0 or height <= 0:
+                return None
+            return width, height, img.mode
+    except Exception:
+        return None
+
+
+def _scan_cache_path(cache_dir, input_dir):
+    digest = hashlib.sha1(os.path.abspath(input_dir).encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, digest + ".json")
+
+
+def _load_scan_cache(cache_path, input_dir):
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("dir") != os.path.abspath(input_dir):
+        return {}
+    return data.get("entries", {})
+
+
+def _save_scan_cache(cache_path, input_dir, entries):
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dir": os.path.abspath(input_dir), "entries": entries}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+
+
+# --- 预扫描目录 ---
+# 用 os.scandir 一次列出目录 (Windows/网络共享上目录项自带 mtime 与大小)，
+# 与缓存比对后只对新增或变化的文件读取文件头。cache_dir 为 None 时不使用缓存。
+def prescan_directory(input_dir, workers=DEFAULT_SCAN_WORKERS, cache_dir=DEFAULT_SCAN_CACHE_DIR):
+    start = time.perf_counter()
+    stats = {}
+    with os.scandir(input_dir) as it:
+        for entry in it:
+            if os.path.splitext(entry.name)[1].lower() not in IMAGE_EXTENSIONS:
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            stats[entry.name] = (st.st_mtime_ns, st.st_size)
+    files = sorted(stats, key=natural_sort_key)
+
+    cache_path = _scan_cache_path(cache_dir, input_dir) if cache_dir else None
+    cached_entries = _load_scan_cache(cache_path, input_dir) if cache_path else {}
+    infos = {}
+    to_probe = []
+    for name in files:
+        cached = cached_entries.get(name)
+        if cached and (cached[0], cached[1]) == stats[name]:
+            infos[name] = tuple(cached[2]) if cached[2] else None
+        else:
+            to_probe.append(name)
+    cached_count = len(files) - len(to_probe)
+
+    if to_probe:
+        if workers > 1 and len(to_probe) > 1:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(workers, len(to_probe))) as executor:
+                results = executor.map(_probe_header, [os.path.join(input_dir, f) for f in to_probe])
+                infos.update(zip(to_probe, results))
+        else:
+            for name in to_probe:
+                infos[name] = _probe_header(os.path.join(input_dir, name))
+        if cache_path:
+            _save_scan_cache(cache_path, input_dir,
+                             {name: [stats[name][0], stats[name][1], infos[name]] for name in files})
+
+    return FrameScan(input_dir, files, infos, cached_count, time.perf_counter() - start)
+
+
+# --- 按规则选定单帧尺寸与模式 ---
+# first: 第一个可读取的帧；max: 所有帧的最大宽/高；mode: 出现最多的尺寸。
+# max/mode 规则下模式取出现最多的模式。没有可读取的帧时抛出 ValueError
+def choose_frame_size(scan, rule='first'):
+    readable = [scan.infos[f] for f in scan.files if scan.infos[f] is not None]
+    if not readable:
+        raise ValueError(f"目录 {scan.input_dir} 中没有可读取的图像帧")
+    if rule == 'first':
+        return readable[0]
+    if rule not in FRAME_SIZE_RULES:
+        raise ValueError(f"未知的帧尺寸规则 '{rule}'")
+    image_mode = collections.Counter(info[2] for info in readable).most_common(1)[0][0]
+    if rule == 'max':
+        return max(info[0] for info in readable), max(info[1] for info in readable), image_mode
+    frame_width, frame_height = collections.Counter(info[:2] for info in readable).most_common(1)[0][0]
+    return frame_width, frame_height, image_mode
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+# 拆分序列图：create_sprite_sheet 的逆操作，按列数/行数或单帧尺寸把序列图切回单帧文件。
+# 序列图只解码一次；磁盘布局与内存布局一致的未压缩文件 (8 位灰度 BMP/TIFF/PGM、RGBA TIFF) 由 Pillow 直接内存映射，
+# 不复制整张像素 (RGB 在内存中按每像素 4 字节存放，RGB 的 BMP/TIFF/PPM 仍需完整读入)。
+# 各帧的裁剪与编码交给线程池并行完成 (Pillow 编码时释放 GIL)。
+# 输出文件名带补零序号，按 natural_sort_key 排序的顺序与格子顺序一致，拆分 → 编辑 → 合并可无损往返；
+# 序列图旁有去重模式生成的 .frames.json 时，按其中的网格与原始文件名还原每一帧。
+import os
+import json
+
+from sprite_sheet_core import Image, DEFAULT_DECODE_WORKERS, scan_image_files, _write_core_error_log
+from sprite_sheet_encode import save_options
+from sprite_sheet_pool import ordered_map
+from sprite_sheet_progress import RunMetrics
+
+# 拆分输出只提供合并时可以读回的无损格式
+SLICE_FORMATS = ('png', 'bmp', 'tif')
+# 序号至少补零到 4 位，帧数更多时按最大序号的位数补齐
+SLICE_MIN_DIGITS = 4
+
+
+def suggest_slice_dir(sheet_path):
+    return os.path.splitext(sheet_path)[0] + "_frames"
+
+
+# 默认文件名前缀：序列图文件名去掉 "_spritesheet" 后缀，如 walk_spritesheet.png -> walk_0000.png
+def default_prefix(sheet_path):
+    base = os.path.splitext(os.path.basename(sheet_path))[0]
+    if base.endswith("_spritesheet") and len(base) > len("_spritesheet"):
+        base = base[:-len("_spritesheet")]
+    return base + "_"
+
+
+# --- 计算拆分网格 ---
+# 横纵两个方向各自由 "格子数" 与 "单帧边长" 中的任意一个推出另一个，与合并时的网格模型一致。
+# 返回 (列数, 行数, 单帧宽, 单帧高)；条件不足或超出序列图范围时抛出 ValueError
+def slice_layout(sheet_width, sheet_height, columns=None, rows=None, frame_width=None, frame_height=None):
+    def resolve_axis(total, count, size, count_name, size_name):
+        if count is None and size is None:
+            raise ValueError(f"需要指定{count_name}或{size_name}")
+        if size is None:
+            size = total // count
+        elif count is None:
+            count = total // size
+        if count <= 0 or size <= 0 or count * size > total:
+            raise ValueError(f"{count_name} {count} x {size_name} {size} 超出序列图范围 ({total} 像素)")
+        return count, size
+
+    columns, frame_width = resolve_axis(sheet_width, columns, frame_width, "列数", "单帧宽度")
+    rows, frame_height = resolve_axis(sheet_height, rows, frame_height, "行数", "单帧高度")
+    return columns, rows, frame_width, frame_height
+
+
+# --- 读取去重模式的帧映射 ---
+# 返回 (列数, 行数, 单帧宽, 单帧高, [(文件名, 格子序号)])；文件不存在或内容无效时返回 None
+def read_frame_map(sheet_path):
+    try:
+        with open(os.path.splitext(sheet_path)[0] + ".frames.json", "r", encoding="utf-8") as f:
+            data = json.load(f)
+        frames = [(entry["filename"], entry["cell"]) for entry in data["frames"] if entry["cell"] is not None]
+        return data["columns"], data["rows"], data["frame_width"], data["frame_height"], frames
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _cell_box(cell, columns, frame_width, frame_height):
+    x = (cell % columns) * frame_width
+    y = (cell // columns) * frame_height
+    return x, y, x + frame_width, y + frame_height
+
+
+# 合并时未填满的格子保持画布初值 (全 0)；从末尾去掉这些空格子
+def _trim_empty_tail(sheet, boxes):
+    count = len(boxes)
+    while count > 0 and sheet.crop(boxes[count - 1]).getbbox() is None:
+        count -= 1
+    return count
+
+
+# 在工作线程中裁剪并编码单帧，返回输出字节数
+def _save_cell(sheet, box, output_path, options):
+    sheet.crop(box).save(output_path, **options)
+    return os.path.getsize(output_path)
+
+
+# --- 核心逻辑函数 (拆分序列图) ---
+# 网格参数均未指定时使用序列图旁的 .frames.json；frame_count 限制输出的帧数，
+# drop_empty_tail 为真时去掉末尾未填充的空格子
+def slice_sprite_sheet(sheet_path, output_dir, status_callback, columns=None, rows=None,
+                       frame_width=None, frame_height=None, frame_count=None, drop_empty_tail=False,
+                       prefix=None, output_format='png', encode_profile=None,
+                       workers=DEFAULT_DECODE_WORKERS, metrics=None):
+    if metrics is None:
+        metrics = RunMetrics()
+    try:
+        if output_format not in SLICE_FORMATS:
+            status_callback(f"错误：不支持的输出格式 '{output_format}'，可选: {', '.join(SLICE_FORMATS)}")
+            return False
+        if prefix is None:
+            prefix = default_prefix(sheet_path)
+
+        metrics.begin("decode")
+        with Image.open(sheet_path) as sheet:
+            # 只解码一次；可映射的未压缩格式在这里直接映射文件，之后各线程共享只读的像素数据
+            sheet.load()
+            metrics.end()
+            sheet_width, sheet_height = sheet.size
+            status_callback(f"已读取序列图: {sheet_width}x{sheet_height} (模式: {sheet.mode}"
+                            f"{'，内存映射' if sheet.readonly else ''})")
+
+            frame_map = None
+            if columns is None and rows is None and frame_width is None and frame_height is None:
+                frame_map = read_frame_map(sheet_path)
+            if frame_map is not None:
+                columns, rows, frame_width, frame_height, mapped = frame_map
+                if columns * frame_width > sheet_width or rows * frame_height > sheet_height:
+                    status_callback("错误：帧映射文件中的网格超出序列图范围，请重新生成或手动指定网格。")
+                    return False
+                status_callback(f"使用帧映射文件: 网格={columns}x{rows}, 单帧={frame_width}x{frame_height}，"
+                                f"{len(mapped)} 帧")
+                names = [os.path.splitext(name)[0] + "." + output_format for name, _ in mapped]
+                cells = [cell for _, cell in mapped]
+            else:
+                try:
+                    columns, rows, frame_width, frame_height = slice_layout(
+                        sheet_width, sheet_height, columns, rows, frame_width, frame_height)
+                except ValueError as layout_e:
+                    status_callback(f"错误：{layout_e}")
+                    return False
+                status_callback(f"拆分网格: {columns}x{rows}, 单帧={frame_width}x{frame_height}")
+                unused_x = sheet_width - columns * frame_width
+                unused_y = sheet_height - rows * frame_height
+                if unused_x or unused_y:
+                    status_callback(f"警告：序列图右侧 {unused_x} 像素、底部 {unused_y} 像素不属于任何格子，已忽略。")
+                cells = list(range(columns * rows))
+                names = None
+
+            boxes = [_cell_box(cell, columns, frame_width, frame_height) for cell in cells]
+            if names is None:
+                if frame_count is not None:
+                    boxes = boxes[:frame_count]
+                if drop_empty_tail:
+                    kept = _trim_empty_tail(sheet, boxes)
+                    if kept < len(boxes):
+                        status_callback(f"去掉末尾 {len(boxes) - kept} 个空格子。")
+                    boxes = boxes[:kept]
+                digits = max(SLICE_MIN_DIGITS, len(str(len(boxes) - 1)))
+                names = [f"{prefix}{i:0{digits}d}.{output_format}" for i in range(len(boxes))]
+            if not boxes:
+                status_callback("错误：没有需要输出的帧。")
+                return False
+
+            if not os.path.isdir(output_dir):
+                os.makedirs(output_dir)
+                status_callback(f"已创建输出目录: {output_dir}")
+            others = set(scan_image_files(output_dir)) - set(names)
+            if others:
+                status_callback(f"警告：输出目录中已有 {len(others)} 个其他图像文件，重新合并该目录时会一并读入。")
+
+            options = save_options(names[0], encode_profile)
+            status_callback(f"开始拆分: {len(boxes)} 帧 -> {output_dir}")
+            metrics.begin("frames", len(boxes))
+            failed = _save_cells(sheet, boxes, [os.path.join(output_dir, name) for name in names],
+                                 options, workers, status_callback, metrics)
+            metrics.end()
+
+        if failed:
+            status_callback(f"错误：{failed} 帧保存失败。")
+            return False
+        status_callback(f"成功！已拆分 {len(boxes)} 帧至: {output_dir}")
+        return True
+
+    except FileNotFoundError:
+        status_callback(f"错误：序列图文件未找到 {sheet_path}")
+        return False
+    except Exception as e:
+        status_callback(f"拆分序列图时发生未预料的错误: {e}")
+        _write_core_error_log("slice_sprite_sheet", status_callback)
+        return False
+
+
+# 按顺序提交裁剪/编码任务 (线程池，各线程共享同一张序列图)；返回失败的帧数
+def _save_cells(sheet, boxes, output_paths, options, workers, status_callback, metrics):
+    failed = 0
+
+    def finish(index, get_result):
+        nonlocal failed
+        try:
+            byte_count = get_result()
+        except Exception as save_e:
+            status_callback(f"错误：保存帧 {os.path.basename(output_paths[index])} 时出错: {save_e}")
+            failed += 1
+            byte_count = 0
+        metrics.advance(index, byte_count)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(boxes) <= 1:
+        for i, (box, path) in enumerate(zip(boxes, output_paths)):
+            finish(i, lambda: _save_cell(sheet, box, path, options))
+        return failed
+
+    arg_list = [(sheet, box, path, options) for box, path in zip(boxes, output_paths)]
+    for index, future in ordered_map(_save_cell, arg_list, workers):
+        finish(index, future.result)
+    return failed
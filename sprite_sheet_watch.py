@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# 监视模式：轮询输入目录，一批修改平息后 (防抖) 增量重建序列图。
+# 重建复用帧缓存与 .cells.json 格子记录：未变化的格子直接沿用上次输出，
+# 插入/删除帧导致后续格子移位时从帧缓存读取，只有新增或修改的帧需要重新解码；
+# 输出先写入临时文件再替换，引擎等读取方不会看到写了一半的序列图。
+import os
+import time
+import threading
+
+from sprite_sheet_cache import FrameCache
+from sprite_sheet_core import (IMAGE_EXTENSIONS, DEFAULT_DECODE_WORKERS, create_sprite_sheet,
+                               resolve_grid)
+from sprite_sheet_progress import RunMetrics
+from sprite_sheet_scan import prescan_directory, choose_frame_size
+
+# 轮询间隔与防抖时间 (秒)：目录在 debounce 时间内没有新的变化才开始重建
+DEFAULT_WATCH_INTERVAL = 0.2
+DEFAULT_WATCH_DEBOUNCE = 0.3
+# 监视模式默认使用最快的编码档位，缩短从保存帧到序列图更新的时间
+DEFAULT_WATCH_ENCODE_PROFILE = 'fast'
+
+
+# --- 目录快照 ---
+# 文件名 -> (mtime_ns, 大小)，只包含支持的图像文件
+def directory_snapshot(input_dir):
+    snapshot = {}
+    with os.scandir(input_dir) as it:
+        for entry in it:
+            if os.path.splitext(entry.name)[1].lower() not in IMAGE_EXTENSIONS:
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            snapshot[entry.name] = (st.st_mtime_ns, st.st_size)
+    return snapshot
+
+
+# 返回 (新增, 修改, 删除) 的文件名列表
+def diff_snapshots(old, new):
+    added = [name for name in new if name not in old]
+    changed = [name for name in new if name in old and new[name] != old[name]]
+    removed = [name for name in old if name not in new]
+    return added, changed, removed
+
+
+class SheetWatcher:
+    def __init__(self, input_dir, output_path, status_callback, columns=None, rows=None,
+                 frame_size_rule='first', encode_profile=DEFAULT_WATCH_ENCODE_PROFILE,
+                 cache=None, workers=DEFAULT_DECODE_WORKERS):
+        self.input_dir = input_dir
+        self.output_path = output_path
+        self.status_callback = status_callback
+        # 未指定列数时在首次重建后固定下来，之后帧数变化只增减行数，插入/删除帧只让后续格子移位
+        self.columns = columns
+        self.rows = rows
+        self.frame_size_rule = frame_size_rule
+        self.encode_profile = encode_profile
+        self.cache = cache if cache is not None else FrameCache()
+        self.workers = workers
+        self.build_count = 0
+
+    # --- 增量重建一次 ---
+    def rebuild(self):
+        metrics = RunMetrics()
+        metrics.begin("scan")
+        scan = prescan_directory(self.input_dir)
+        metrics.end()
+        if not scan.files:
+            self.status_callback("警告：输入目录中没有图像帧，等待新的帧...")
+            return False
+        try:
+            frame_width, frame_height, image_mode = choose_frame_size(scan, self.frame_size_rule)
+        except ValueError as size_e:
+            self.status_callback(f"警告：{size_e}，等待新的帧...")
+            return False
+        columns, rows = resolve_grid(len(scan.files), self.columns, self.rows)
+        if self.columns is None and self.rows is None:
+            self.columns = columns
+        success = create_sprite_sheet(self.input_dir, columns, rows, self.output_path, self.status_callback,
+                                      frame_width, frame_height, image_mode, scan.files, False,
+                                      workers=self.workers, cache=self.cache,
+                                      encode_profile=self.encode_profile, metrics=metrics,
+                                      atomic_save=True)
+        self.build_count += 1
+        self.status_callback(metrics.describe())
+        return success
+
+    # --- 监视循环 ---
+    # 阻塞运行直到 stop_event 被设置；首次进入时先完整构建一次
+    def run(self, stop_event, interval=DEFAULT_WATCH_INTERVAL, debounce=DEFAULT_WATCH_DEBOUNCE):
+        self.status_callback(f"开始监视目录: {self.input_dir} (轮询 {interval:.1f}s，防抖 {debounce:.1f}s)")
+        built = directory_snapshot(self.input_dir)
+        self.rebuild()
+        latest = built
+        last_change = None
+        missing_reported = False
+        while not stop_event.wait(interval):
+            try:
+                current = directory_snapshot(self.input_dir)
+            except OSError as dir_e:
+                if not missing_reported:
+                    self.status_callback(f"警告：无法读取输入目录 ({dir_e})，继续等待...")
+                    missing_reported = True
+                continue
+            missing_reported = False
+            now = time.monotonic()
+            if current != latest:
+                latest = current
+                last_change = now
+            if latest == built or now - last_change < debounce:
+                continue
+            added, changed, removed = diff_snapshots(built, latest)
+            self.status_callback(f"检测到变化：新增 {len(added)} 帧，修改 {len(changed)} 帧，删除 {len(removed)} 帧，正在更新...")
+            built = latest
+            start = time.perf_counter()
+            try:
+                success = self.rebuild()
+            except Exception as build_e:
+                self.status_callback(f"错误：更新序列图时出错: {build_e}，等待下一次变化...")
+                continue
+            if success:
+                self.status_callback(f"序列图已更新：重建用时 {time.perf_counter() - start:.2f}s，"
+                                     f"自检测到变化起 {time.monotonic() - last_change:.2f}s")
+        self.status_callback("已停止监视。")
+
+
+# 在后台线程中运行监视，返回 (线程, 停止事件)
+def start_watch_thread(watcher, interval=DEFAULT_WATCH_INTERVAL, debounce=DEFAULT_WATCH_DEBOUNCE):
+    stop_event = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(stop_event, interval, debounce), daemon=True)
+    thread.start()
+    return thread, stop_event
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# 图集装箱 (pack_rects) 的几何检查：所有矩形都在图集范围内、互不重叠且相隔至少 padding 像素
+import random
+
+import pytest
+
+from sprite_sheet_atlas import pack_rects
+
+
+def _random_sizes(seed, count, max_side):
+    rng = random.Random(seed)
+    return [(rng.randint(1, max_side), rng.randint(1, max_side)) for _ in range(count)]
+
+
+def _assert_valid_packing(sizes, width, height, positions, padding):
+    assert len(positions) == len(sizes)
+    rects = []
+    for (w, h), pos in zip(sizes, positions):
+        assert pos is not None
+        x, y = pos
+        assert 0 <= x and x + w <= width
+        assert 0 <= y and y + h <= height
+        rects.append((x, y, x + w, y + h))
+    # 向右下方扩展 padding 后仍不相交，即任意两个矩形之间至少间隔 padding
+    for i, (ax0, ay0, ax1, ay1) in enumerate(rects):
+        for bx0, by0, bx1, by1 in rects[i + 1:]:
+            assert (ax1 + padding <= bx0 or bx1 + padding <= ax0
+                    or ay1 + padding <= by0 or by1 + padding <= ay0)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("padding", [0, 2])
+@pytest.mark.parametrize("power_of_two", [True, False])
+def test_rects_in_bounds_without_overlap(seed, padding, power_of_two):
+    sizes = _random_sizes(seed, 150, 64)
+    width, height, positions = pack_rects(sizes, max_size=1024, power_of_two=power_of_two, padding=padding)
+    assert width <= 1024 and height <= 1024
+    if power_of_two:
+        assert width & (width - 1) == 0 and height & (height - 1) == 0
+    _assert_valid_packing(sizes, width, height, positions, padding)
+
+
+def test_identical_sizes_fill_exactly():
+    sizes = [(32, 32)] * 16
+    width, height, positions = pack_rects(sizes, max_size=1024)
+    assert (width, height) == (128, 128)
+    _assert_valid_packing(sizes, width, height, positions, 0)
+
+
+def test_frame_larger_than_limit_is_rejected():
+    with pytest.raises(ValueError):
+        pack_rects([(10, 10), (300, 20)], max_size=256)
+
+
+def test_frames_exceeding_atlas_area_are_rejected():
+    with pytest.raises(ValueError):
+        pack_rects([(100, 100)] * 10, max_size=256)
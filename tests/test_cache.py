@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# 帧缓存索引 (index.json) 的清理与合并
+import os
+import json
+
+from PIL import Image
+
+from sprite_sheet_cache import FrameCache
+
+
+def _make_frame(path, color):
+    Image.new("RGBA", (8, 8), color).save(path)
+    return path
+
+
+def _cache_frame(cache, path):
+    key = cache.frame_key(path, 8, 8, "RGBA")
+    with Image.open(path) as img:
+        cache.put(key, img.convert("RGBA"))
+    return key
+
+
+def _index_paths(cache_dir):
+    with open(os.path.join(cache_dir, "index.json"), "r", encoding="utf-8") as f:
+        return set(json.load(f))
+
+
+def test_concurrent_flushes_merge_index(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    first = _make_frame(str(tmp_path / "first.png"), (255, 0, 0, 255))
+    second = _make_frame(str(tmp_path / "second.png"), (0, 255, 0, 255))
+    cache_a = FrameCache(cache_dir)
+    cache_b = FrameCache(cache_dir)
+    _cache_frame(cache_a, first)
+    _cache_frame(cache_b, second)
+    cache_a.flush()
+    cache_b.flush()
+    assert _index_paths(cache_dir) == {os.path.abspath(first), os.path.abspath(second)}
+
+
+def test_flush_prunes_deleted_and_evicted_files(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    kept = _make_frame(str(tmp_path / "kept.png"), (255, 0, 0, 255))
+    deleted = _make_frame(str(tmp_path / "deleted.png"), (0, 0, 255, 255))
+    cache = FrameCache(cache_dir)
+    _cache_frame(cache, kept)
+    _cache_frame(cache, deleted)
+    cache.flush()
+    assert len(_index_paths(cache_dir)) == 2
+
+    # 删除源文件并淘汰全部条目后，下一次运行只保留本次用到的记录
+    os.remove(deleted)
+    cache = FrameCache(cache_dir, max_bytes=0)
+    cache.frame_key(kept, 8, 8, "RGBA")
+    assert cache.flush() == 2
+    assert _index_paths(cache_dir) == {os.path.abspath(kept)}
+
+    FrameCache(cache_dir).flush()
+    assert _index_paths(cache_dir) == set()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# 去重合并：网格按不重复的帧数收缩 (普通画布与数组画布)，失败的帧记为 null，.frames.json 映射正确
+import os
+import json
+
+import pytest
+from PIL import Image
+
+import sprite_sheet_core
+from sprite_sheet_core import create_sprite_sheet, scan_image_files
+
+FRAME_SIZE = (16, 16)
+
+
+def _frame(seed):
+    return Image.new("RGBA", FRAME_SIZE, (seed * 40 % 256, 255 - seed * 30 % 256, seed * 9 % 256, 255))
+
+
+# seeds 为每帧的内容编号，相同编号的帧内容相同
+def _make_frames(frame_dir, seeds):
+    os.makedirs(frame_dir)
+    for i, seed in enumerate(seeds):
+        _frame(seed).save(os.path.join(frame_dir, f"frame_{i:02d}.png"))
+    return frame_dir
+
+
+def _merge(frame_dir, output_path, columns, rows, resize_output=False):
+    messages = []
+    success = create_sprite_sheet(frame_dir, columns, rows, output_path, messages.append,
+                                  FRAME_SIZE[0], FRAME_SIZE[1], "RGBA", scan_image_files(frame_dir),
+                                  resize_output, dedupe=True)
+    assert success, messages
+    return messages
+
+
+def _read_frame_map(output_path):
+    with open(os.path.splitext(output_path)[0] + ".frames.json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _cell_pixels(sheet, cell, columns):
+    x, y = (cell % columns) * FRAME_SIZE[0], (cell // columns) * FRAME_SIZE[1]
+    return sheet.crop((x, y, x + FRAME_SIZE[0], y + FRAME_SIZE[1])).tobytes()
+
+
+# (帧内容编号, 收缩后的列数, 行数)：第一组只减少行数，第二组行列都减少
+@pytest.mark.parametrize("seeds, columns, rows", [
+    ([0, 1, 2, 0, 3, 4, 1, 5, 2, 0, 3, 4], 4, 2),
+    ([0, 1, 0, 2, 1, 0, 2, 2], 3, 1),
+])
+@pytest.mark.parametrize("min_frame_bytes", [0, 1 << 40])
+def test_grid_shrinks_to_unique_frames(tmp_path, monkeypatch, seeds, columns, rows, min_frame_bytes):
+    # 0: 数组画布；极大值: 普通画布 (Image.paste)
+    monkeypatch.setattr(sprite_sheet_core, "ARRAY_CANVAS_MIN_FRAME_BYTES", min_frame_bytes)
+    frame_dir = _make_frames(str(tmp_path / "frames"), seeds)
+    out = str(tmp_path / "out.png")
+    messages = _merge(frame_dir, out, 4, 4)
+    assert any(f"网格调整为 {columns}x{rows}" in m for m in messages)
+
+    frame_map = _read_frame_map(out)
+    unique = list(dict.fromkeys(seeds))
+    assert (frame_map["columns"], frame_map["rows"], frame_map["cells"]) == (columns, rows, len(unique))
+    assert [entry["cell"] for entry in frame_map["frames"]] == [unique.index(seed) for seed in seeds]
+    with Image.open(out) as sheet:
+        assert sheet.size == (columns * FRAME_SIZE[0], rows * FRAME_SIZE[1])
+        for cell, seed in enumerate(unique):
+            assert _cell_pixels(sheet, cell, columns) == _frame(seed).tobytes()
+
+
+def test_failed_frame_maps_to_null(tmp_path):
+    frame_dir = _make_frames(str(tmp_path / "frames"), [0, 1, 0])
+    with open(os.path.join(frame_dir, "frame_03.png"), "wb") as f:
+        f.write(b"not an image")
+    _frame(1).save(os.path.join(frame_dir, "frame_04.png"))
+    out = str(tmp_path / "out.png")
+    messages = _merge(frame_dir, out, 3, 2)
+    assert any("4 帧中有 2 个不同的帧" in m for m in messages)
+
+    frame_map = _read_frame_map(out)
+    assert frame_map["image"] == "out.png"
+    assert (frame_map["frame_width"], frame_map["frame_height"]) == FRAME_SIZE
+    assert [(entry["filename"], entry["cell"]) for entry in frame_map["frames"]] == [
+        ("frame_00.png", 0), ("frame_01.png", 1), ("frame_02.png", 0), ("frame_03.png", None), ("frame_04.png", 1)]
+
+
+def test_resize_output_skips_dedupe_and_frame_map(tmp_path):
+    frame_dir = _make_frames(str(tmp_path / "frames"), [0, 1, 0, 2])
+    out = str(tmp_path / "out.png")
+    _merge(frame_dir, out, 2, 2)
+    assert os.path.isfile(str(tmp_path / "out.frames.json"))
+
+    # 压缩到单帧大小后不再有网格：忽略去重，并删除上次留下的帧映射
+    messages = _merge(frame_dir, out, 2, 2, resize_output=True)
+    assert any("不支持去重" in m for m in messages)
+    assert not os.path.exists(str(tmp_path / "out.frames.json"))
+    with Image.open(out) as sheet:
+        assert sheet.size == FRAME_SIZE
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# 编码档位、调色板量化与保存 (含原子替换) 的测试
+import io
+import os
+import random
+
+import pytest
+from PIL import Image, ImageDraw, features
+
+from sprite_sheet_encode import ENCODE_PROFILES, JPEG_QUALITY, quantize_image, save_image, save_options
+
+
+FRAME_SIZE = 32
+COLUMNS = 4
+
+
+# 与基准测试的合成帧相同思路：渐变背景 + 随机圆形，按帧序号确定
+def _frame(index):
+    rng = random.Random(index)
+    gradient = Image.linear_gradient("L").resize((FRAME_SIZE, FRAME_SIZE))
+    img = Image.merge("RGB", (gradient, gradient.transpose(Image.Transpose.ROTATE_90),
+                              Image.new("L", gradient.size, rng.randrange(256))))
+    draw = ImageDraw.Draw(img)
+    for _ in range(4):
+        x0, y0 = rng.randrange(FRAME_SIZE), rng.randrange(FRAME_SIZE)
+        x1, y1 = x0 + rng.randrange(1, FRAME_SIZE // 2), y0 + rng.randrange(1, FRAME_SIZE // 2)
+        draw.ellipse((x0, y0, x1, y1), fill=(rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    return img
+
+
+# 16 帧 4x4 的序列图；RGBA 时每帧四周留出透明边
+def _sheet(mode="RGBA"):
+    sheet = Image.new(mode, (COLUMNS * FRAME_SIZE, COLUMNS * FRAME_SIZE))
+    for i in range(COLUMNS * COLUMNS):
+        frame = _frame(i)
+        if mode == "RGBA":
+            alpha = Image.new("L", frame.size, 0)
+            ImageDraw.Draw(alpha).rectangle((2, 2, FRAME_SIZE - 3, FRAME_SIZE - 3), fill=255)
+            frame.putalpha(alpha)
+        sheet.paste(frame, ((i % COLUMNS) * FRAME_SIZE, (i // COLUMNS) * FRAME_SIZE))
+    return sheet
+
+
+def test_save_options_by_extension():
+    assert save_options("out.png", None) == {}
+    assert save_options("out.PNG", "fast") == ENCODE_PROFILES["fast"]["png"]
+    assert save_options("out.webp", "smallest") == ENCODE_PROFILES["smallest"]["webp"]
+    assert save_options("out.jpeg", "balanced") == ENCODE_PROFILES["balanced"]["jpeg"]
+    # 没有档位参数的格式使用 Pillow 默认值
+    assert save_options("out.bmp", "smallest") == {}
+    # 返回副本，调用方修改不影响档位表
+    save_options("out.png", "fast")["compress_level"] = 9
+    assert ENCODE_PROFILES["fast"]["png"]["compress_level"] == 1
+    with pytest.raises(ValueError):
+        save_options("out.png", "tiny")
+
+
+def test_jpeg_quality_is_the_same_in_every_profile():
+    for profile in ENCODE_PROFILES:
+        assert save_options("out.jpg", profile)["quality"] == JPEG_QUALITY
+
+
+@pytest.mark.skipif(not features.check("webp"), reason="Pillow 未编译 WebP 支持")
+def test_webp_profiles_differ():
+    img = _sheet()
+    sizes = {}
+    for profile in ("balanced", "smallest"):
+        buffer = io.BytesIO()
+        img.save(buffer, "WEBP", **save_options("out.webp", profile))
+        sizes[profile] = len(buffer.getvalue())
+    assert sizes["smallest"] < sizes["balanced"]
+
+
+@pytest.mark.parametrize("mode", ["RGBA", "RGB", "L"])
+def test_quantize_image(mode):
+    img = _sheet("RGBA" if mode == "RGBA" else "RGB").convert(mode)
+    quantized = quantize_image(img)
+    assert quantized.mode == "P"
+    assert quantized.size == img.size
+    assert len(quantized.getcolors(256)) <= 256
+    assert quantize_image(quantized) is quantized
+
+
+def test_quantize_is_ignored_for_jpeg(tmp_path):
+    messages = []
+    out = str(tmp_path / "out.jpg")
+    save_image(_sheet("RGB"), out, messages.append, "balanced", quantize=True)
+    assert any("JPEG 不支持调色板" in m for m in messages)
+    with Image.open(out) as result:
+        assert result.format == "JPEG" and result.mode == "RGB"
+
+    messages = []
+    out = str(tmp_path / "out.png")
+    save_image(_sheet(), out, messages.append, "balanced", quantize=True)
+    assert not any("警告" in m for m in messages)
+    with Image.open(out) as result:
+        assert result.mode == "P"
+
+
+def test_atomic_save_leaves_no_temp_file(tmp_path):
+    out = str(tmp_path / "out.png")
+    Image.new("RGBA", (4, 4)).save(out)
+    elapsed, byte_count = save_image(_sheet(), out, lambda m: None, "fast", atomic=True)
+    assert os.listdir(str(tmp_path)) == ["out.png"]
+    assert byte_count == os.path.getsize(out)
+    with Image.open(out) as result:
+        assert result.size == (COLUMNS * FRAME_SIZE, COLUMNS * FRAME_SIZE)
+
+
+def test_failed_atomic_save_keeps_previous_output(tmp_path):
+    out = str(tmp_path / "out.jpg")
+    Image.new("RGB", (4, 4), (1, 2, 3)).save(out)
+    with open(out, "rb") as f:
+        previous = f.read()
+    # RGBA 不能写成 JPEG：保存失败时旧文件保持不变，临时文件被删除
+    with pytest.raises(OSError):
+        save_image(_sheet(), out, lambda m: None, "fast", atomic=True)
+    assert os.listdir(str(tmp_path)) == ["out.jpg"]
+    with open(out, "rb") as f:
+        assert f.read() == previous
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# 增量重建 (帧缓存 + .cells.json) 的回归测试
+import os
+
+import pytest
+from PIL import Image
+
+import sprite_sheet_core
+from sprite_sheet_cache import FrameCache
+from sprite_sheet_core import create_sprite_sheet, scan_image_files
+
+FRAME_SIZE = (16, 16)
+
+
+def _make_frames(frame_dir, count, base_color):
+    os.makedirs(frame_dir)
+    for i in range(count):
+        color = ((base_color + i * 20) % 256, i * 7 % 256, base_color % 256, 255)
+        Image.new("RGBA", FRAME_SIZE, color).save(os.path.join(frame_dir, f"frame_{i}.png"))
+    return frame_dir
+
+
+def _merge(frame_dir, output_path, cache=None, columns=3, rows=3, image_mode="RGBA"):
+    messages = []
+    success = create_sprite_sheet(frame_dir, columns, rows, output_path, messages.append,
+                                  FRAME_SIZE[0], FRAME_SIZE[1], image_mode, scan_image_files(frame_dir), False,
+                                  cache=cache)
+    assert success, messages
+    return messages
+
+
+def _pixels(path):
+    with Image.open(path) as img:
+        return img.convert("RGBA").tobytes()
+
+
+def test_uncached_save_invalidates_cells_file(tmp_path):
+    dir_a = _make_frames(str(tmp_path / "a"), 9, 10)
+    dir_b = _make_frames(str(tmp_path / "b"), 9, 130)
+    reference = str(tmp_path / "reference.png")
+    _merge(dir_a, reference)
+    out = str(tmp_path / "out.png")
+    cache_dir = str(tmp_path / "cache")
+
+    _merge(dir_a, out, FrameCache(cache_dir))
+    _merge(dir_b, out)
+    assert not os.path.exists(out + ".cells.json")
+    _merge(dir_a, out, FrameCache(cache_dir))
+    assert _pixels(out) == _pixels(reference)
+
+
+def test_external_edit_invalidates_cells_file(tmp_path):
+    dir_a = _make_frames(str(tmp_path / "a"), 9, 10)
+    reference = str(tmp_path / "reference.png")
+    _merge(dir_a, reference)
+    out = str(tmp_path / "out.png")
+    cache_dir = str(tmp_path / "cache")
+
+    _merge(dir_a, out, FrameCache(cache_dir))
+    Image.new("RGBA", (48, 48), (255, 255, 255, 255)).save(out)
+    messages = _merge(dir_a, out, FrameCache(cache_dir))
+    assert not any("沿用 9 帧" in m for m in messages)
+    assert _pixels(out) == _pixels(reference)
+
+
+def test_unchanged_output_is_reused(tmp_path):
+    dir_a = _make_frames(str(tmp_path / "a"), 9, 10)
+    out = str(tmp_path / "out.png")
+    cache_dir = str(tmp_path / "cache")
+
+    _merge(dir_a, out, FrameCache(cache_dir))
+    messages = _merge(dir_a, out, FrameCache(cache_dir))
+    assert any("沿用 9 帧" in m for m in messages)
+
+
+@pytest.mark.parametrize("image_mode", ["L", "RGB", "RGBA"])
+def test_incremental_array_canvas_matches_full_build(tmp_path, monkeypatch, image_mode):
+    pytest.importorskip("numpy")
+    # 测试帧很小，取消数组画布的单帧大小下限，使增量路径也在数组中组装
+    monkeypatch.setattr(sprite_sheet_core, "ARRAY_CANVAS_MIN_FRAME_BYTES", 0)
+    dir_a = _make_frames(str(tmp_path / "a"), 9, 10)
+    out = str(tmp_path / "out.png")
+    cache_dir = str(tmp_path / "cache")
+    _merge(dir_a, out, FrameCache(cache_dir), image_mode=image_mode)
+
+    Image.new("RGBA", FRAME_SIZE, (1, 2, 3, 255)).save(os.path.join(dir_a, "frame_4.png"))
+    os.remove(os.path.join(dir_a, "frame_8.png"))
+    messages = _merge(dir_a, out, FrameCache(cache_dir), image_mode=image_mode)
+    assert any("沿用 7 帧" in m for m in messages)
+    reference = str(tmp_path / "reference.png")
+    _merge(dir_a, reference, image_mode=image_mode)
+    assert _pixels(out) == _pixels(reference)
+
+
+@pytest.mark.parametrize("min_frame_bytes", [0, 1 << 40])
+def test_row_count_change_reuses_previous_cells(tmp_path, monkeypatch, min_frame_bytes):
+    # 0: 数组画布；极大值: 普通画布 (Image.paste)
+    monkeypatch.setattr(sprite_sheet_core, "ARRAY_CANVAS_MIN_FRAME_BYTES", min_frame_bytes)
+    frame_dir = _make_frames(str(tmp_path / "a"), 12, 10)
+    removed = [os.path.join(frame_dir, f"frame_{i}.png") for i in range(9, 12)]
+    kept = {}
+    for path in removed:
+        with Image.open(path) as img:
+            kept[path] = img.copy()
+        os.remove(path)
+    out = str(tmp_path / "out.png")
+    cache_dir = str(tmp_path / "cache")
+    _merge(frame_dir, out, FrameCache(cache_dir), rows=3)
+
+    # 追加帧后网格多出一行：原有的 9 帧沿用上次的输出
+    for path, img in kept.items():
+        img.save(path)
+    messages = _merge(frame_dir, out, FrameCache(cache_dir), rows=4)
+    assert any("沿用 9 帧" in m for m in messages)
+    reference = str(tmp_path / "reference.png")
+    _merge(frame_dir, reference, rows=4)
+    assert _pixels(out) == _pixels(reference)
+
+    # 减少行数时只沿用仍在网格内的格子
+    messages = _merge(frame_dir, out, FrameCache(cache_dir), rows=2)
+    assert any("沿用 6 帧" in m for m in messages)
+    _merge(frame_dir, reference, rows=2)
+    assert _pixels(out) == _pixels(reference)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# 分页输出：page_layout、同时组装的页数上限，以及 .pages.json 中帧 → 页/格子/坐标的映射 (含未填满的最后一页)
+import os
+import json
+
+import pytest
+from PIL import Image
+
+import sprite_sheet_pages
+from sprite_sheet_core import DEFAULT_DECODE_WORKERS, scan_image_files
+from sprite_sheet_pages import create_paged_sprite_sheets, page_layout, page_workers, pages_index_path
+
+FRAME_SIZE = (16, 12)
+
+
+def _frame(index):
+    return Image.new("RGBA", FRAME_SIZE, (index * 13 % 256, index * 29 % 256, index * 71 % 256, 255))
+
+
+@pytest.mark.parametrize("file_count, columns, max_texture, expected", [
+    # 每页最多 4 列 (64 // 16)、5 行 (64 // 12)
+    (45, 8, 64, (4, 5, 20)),
+    # 帧数不足一页时行数按帧数收缩
+    (6, 8, 64, (4, 2, 8)),
+    # 列数小于上限时保持用户的列数
+    (45, 3, 64, (3, 5, 15)),
+    # 帧数少于列数时列数也收缩
+    (2, 8, 64, (2, 1, 2)),
+])
+def test_page_layout(file_count, columns, max_texture, expected):
+    assert page_layout(file_count, columns, FRAME_SIZE[0], FRAME_SIZE[1], max_texture) == expected
+
+
+def test_page_layout_rejects_frame_larger_than_texture():
+    with pytest.raises(ValueError):
+        page_layout(10, 4, 100, 10, 64)
+
+
+def test_page_workers_is_capped(monkeypatch):
+    assert page_workers(None, 100, 64, 64) == min(DEFAULT_DECODE_WORKERS, 100)
+    assert page_workers(16, 3, 64, 64) == 3
+    assert page_workers(0, 3, 64, 64) == 1
+    # 内存预算只够同时组装 2 页 (每页 64x64x4 字节)
+    monkeypatch.setattr(sprite_sheet_pages, "MAX_CONCURRENT_PAGE_BYTES", 2 * 64 * 64 * 4 + 1)
+    assert page_workers(16, 10, 64, 64) == 2
+    # 单页已超出预算时仍逐页组装
+    monkeypatch.setattr(sprite_sheet_pages, "MAX_CONCURRENT_PAGE_BYTES", 1)
+    assert page_workers(16, 10, 64, 64) == 1
+
+
+@pytest.mark.parametrize("pool_mode", ["thread", "process"])
+def test_pages_index_maps_frames_to_cells(tmp_path, pool_mode):
+    frame_dir = str(tmp_path / "frames")
+    os.makedirs(frame_dir)
+    for i in range(45):
+        _frame(i).save(os.path.join(frame_dir, f"frame_{i:02d}.png"))
+    files = scan_image_files(frame_dir)
+    out = str(tmp_path / "out" / "sheet.png")
+
+    messages = []
+    assert create_paged_sprite_sheets(frame_dir, 8, out, messages.append, FRAME_SIZE[0], FRAME_SIZE[1], "RGBA",
+                                      files, max_texture_size=64, workers=4, pool_mode=pool_mode), messages
+    assert any("45 帧分为 3 页" in m and "同时组装 3 页" in m for m in messages)
+
+    with open(pages_index_path(out), "r", encoding="utf-8") as f:
+        index = json.load(f)
+    assert (index["frame_width"], index["frame_height"], index["max_texture_size"]) == (16, 12, 64)
+    # 每页 4x5 = 20 帧，最后一页只有 5 帧，行数收缩为 2
+    assert index["pages"] == [{"image": "sheet_0.png", "columns": 4, "rows": 5},
+                              {"image": "sheet_1.png", "columns": 4, "rows": 5},
+                              {"image": "sheet_2.png", "columns": 4, "rows": 2}]
+    assert [entry["filename"] for entry in index["frames"]] == files
+    for i, entry in enumerate(index["frames"]):
+        page, cell = divmod(i, 20)
+        assert (entry["page"], entry["cell"]) == (page, cell)
+        assert (entry["x"], entry["y"]) == ((cell % 4) * FRAME_SIZE[0], (cell // 4) * FRAME_SIZE[1])
+
+    # 按索引从各页裁出的像素与原帧一致
+    page_images = {}
+    for i, entry in enumerate(index["frames"]):
+        page_info = index["pages"][entry["page"]]
+        if entry["page"] not in page_images:
+            with Image.open(os.path.join(os.path.dirname(out), page_info["image"])) as page_image:
+                assert page_image.size == (page_info["columns"] * FRAME_SIZE[0], page_info["rows"] * FRAME_SIZE[1])
+                page_images[entry["page"]] = page_image.convert("RGBA")
+        box = (entry["x"], entry["y"], entry["x"] + FRAME_SIZE[0], entry["y"] + FRAME_SIZE[1])
+        assert page_images[entry["page"]].crop(box).tobytes() == _frame(i).tobytes()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# 并行解码 (线程池/进程池) 与串行处理的输出须逐字节一致，逐帧状态信息的内容与顺序也相同
+import os
+import re
+
+import pytest
+from PIL import Image
+
+import sprite_sheet_cli
+import sprite_sheet_core
+from sprite_sheet_atlas import create_atlas
+from sprite_sheet_core import create_sprite_sheet, create_sprite_sheet_streaming, scan_image_files
+
+FRAME_SIZE = (16, 16)
+# 串行、线程池 x4、进程池 x4
+POOL_CONFIGS = [(1, "thread"), (4, "thread"), (4, "process")]
+GRID_MESSAGES = ["调整图像 frame_10.png 的尺寸", "转换图像 frame_11.png 的模式", "错误：处理或粘贴图像 frame_12.png"]
+
+
+@pytest.fixture
+def frame_dir(tmp_path):
+    frame_dir = str(tmp_path / "frames")
+    os.makedirs(frame_dir)
+    for i in range(10):
+        Image.new("RGBA", FRAME_SIZE, (i * 25, 255 - i * 20, i * 7, 200)).save(
+            os.path.join(frame_dir, f"frame_{i:02d}.png"))
+    # 需要缩放的帧、需要转换模式的帧与无法解码的文件
+    Image.new("RGBA", (20, 12), (10, 20, 30, 255)).save(os.path.join(frame_dir, "frame_10.png"))
+    Image.new("RGB", FRAME_SIZE, (200, 100, 50)).save(os.path.join(frame_dir, "frame_11.png"))
+    with open(os.path.join(frame_dir, "frame_12.png"), "wb") as f:
+        f.write(b"not an image")
+    return frame_dir
+
+
+# 每种配置输出到各自的目录；比较前去掉输出目录与每次不同的编码用时
+def _run_all(build, tmp_path):
+    results = []
+    for workers, pool_mode in POOL_CONFIGS:
+        out_dir = str(tmp_path / f"{pool_mode}_{workers}")
+        os.makedirs(out_dir)
+        out = os.path.join(out_dir, "sheet.png")
+        messages = []
+        assert build(out, messages.append, workers, pool_mode), messages
+        with open(out, "rb") as f:
+            data = f.read()
+        messages = [re.sub(r"用时 [\d.]+s", "用时 -", m.replace(out_dir, "<out>")) for m in messages]
+        results.append((data, messages))
+    return results
+
+
+# expected 为串行结果中必须出现的逐帧信息片段
+def _assert_all_identical(results, expected):
+    reference_bytes, reference_messages = results[0]
+    for fragment in expected:
+        assert any(fragment in m for m in reference_messages), fragment
+    for data, messages in results[1:]:
+        assert data == reference_bytes
+        assert messages == reference_messages
+
+
+@pytest.mark.parametrize("min_frame_bytes", [0, 1 << 40])
+def test_merge_matches_serial(frame_dir, tmp_path, monkeypatch, min_frame_bytes):
+    # 0: 数组画布；极大值: 普通画布 (Image.paste)
+    monkeypatch.setattr(sprite_sheet_core, "ARRAY_CANVAS_MIN_FRAME_BYTES", min_frame_bytes)
+    files = scan_image_files(frame_dir)
+
+    def build(out, status_callback, workers, pool_mode):
+        return create_sprite_sheet(frame_dir, 4, 4, out, status_callback,
+                                   FRAME_SIZE[0], FRAME_SIZE[1], "RGBA", files, False,
+                                   workers=workers, pool_mode=pool_mode)
+
+    _assert_all_identical(_run_all(build, tmp_path), GRID_MESSAGES)
+
+
+def test_streaming_matches_serial(frame_dir, tmp_path):
+    files = scan_image_files(frame_dir)
+
+    def build(out, status_callback, workers, pool_mode):
+        return create_sprite_sheet_streaming(frame_dir, 4, 4, out, status_callback,
+                                             FRAME_SIZE[0], FRAME_SIZE[1], "RGBA", files, False,
+                                             workers=workers, pool_mode=pool_mode)
+
+    _assert_all_identical(_run_all(build, tmp_path), GRID_MESSAGES)
+
+
+def test_atlas_matches_serial(frame_dir, tmp_path):
+    files = scan_image_files(frame_dir)
+
+    def build(out, status_callback, workers, pool_mode):
+        return create_atlas(frame_dir, out, status_callback, files, workers=workers, pool_mode=pool_mode)
+
+    # 图集保持各帧原尺寸，不会出现缩放信息
+    _assert_all_identical(_run_all(build, tmp_path), ["frame_11.png 的模式", "错误：处理或粘贴图像 frame_12.png"])
+
+
+@pytest.mark.parametrize("command", ["merge", "atlas"])
+def test_cli_pool_mode(frame_dir, tmp_path, command):
+    outputs = []
+    for workers, pool_mode in POOL_CONFIGS:
+        out = str(tmp_path / f"{command}_{pool_mode}_{workers}.png")
+        argv = [command, frame_dir, "-o", out, "--workers", str(workers), "--pool-mode", pool_mode, "-q"]
+        if command == "merge":
+            argv += ["--columns", "4", "--rows", "4"]
+        assert sprite_sheet_cli.main(argv) == 0
+        with open(out, "rb") as f:
+            outputs.append(f.read())
+    assert outputs[1] == outputs[0] and outputs[2] == outputs[0]
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# 流式 PNG 编码器的往返测试：逐行带写出后用 Pillow 读回，像素须与原图一致
+import os
+
+import pytest
+from PIL import Image
+
+import sprite_sheet_png
+from sprite_sheet_png import StreamingPNGWriter
+
+WIDTH, HEIGHT = 150, 200
+# 行带高度不整除图像高度，最后一条行带更短
+STRIP_HEIGHT = 7
+
+
+def _source_image(mode):
+    # 随机噪声几乎不可压缩，输出会跨越多个 IDAT 块；上半部分是纯色，覆盖 Up 滤波后全零的行
+    noise = Image.frombytes(mode, (WIDTH, HEIGHT), os.urandom(WIDTH * HEIGHT * len(mode)))
+    noise.paste(Image.new(mode, (WIDTH, HEIGHT // 2), (90,) * len(mode)), (0, 0))
+    return noise
+
+
+def _write_streaming(path, img, png_filter, workers):
+    row_bytes = WIDTH * len(img.mode)
+    data = img.tobytes()
+    with StreamingPNGWriter(path, WIDTH, HEIGHT, img.mode, compress_level=6,
+                            png_filter=png_filter, compress_workers=workers) as writer:
+        for y in range(0, HEIGHT, STRIP_HEIGHT):
+            writer.write_rows(data[y * row_bytes:min(y + STRIP_HEIGHT, HEIGHT) * row_bytes])
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+@pytest.mark.parametrize("png_filter", ["none", "up"])
+@pytest.mark.parametrize("mode", ["L", "LA", "RGB", "RGBA"])
+def test_round_trip(tmp_path, mode, png_filter, workers):
+    img = _source_image(mode)
+    path = str(tmp_path / "out.png")
+    _write_streaming(path, img, png_filter, workers)
+    with Image.open(path) as result:
+        result.load()
+        assert result.mode == mode
+        assert result.size == (WIDTH, HEIGHT)
+        assert result.tobytes() == img.tobytes()
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_round_trip_without_numpy(tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(sprite_sheet_png, "NUMPY_AVAILABLE", False)
+    img = _source_image("RGBA")
+    path = str(tmp_path / "out.png")
+    _write_streaming(path, img, "up", workers)
+    with Image.open(path) as result:
+        assert result.tobytes() == img.tobytes()
+
+
+def test_incomplete_image_is_rejected(tmp_path):
+    path = str(tmp_path / "out.png")
+    writer = StreamingPNGWriter(path, WIDTH, HEIGHT, "RGB")
+    writer.write_rows(bytes(WIDTH * 3 * STRIP_HEIGHT))
+    with pytest.raises(ValueError):
+        writer.close()
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+# RunMetrics 的耗时统计：restart 之前的空闲时间不计入总耗时，已记录的阶段保留
+import time
+
+from sprite_sheet_progress import RunMetrics
+
+
+def test_restart_excludes_idle_time_and_keeps_phases():
+    metrics = RunMetrics()
+    metrics.begin("scan")
+    time.sleep(0.02)
+    metrics.end()
+    # 模拟等待确认对话框
+    time.sleep(0.3)
+    metrics.restart()
+    metrics.begin("frames", 1)
+    metrics.advance(0, 10)
+    summary = metrics.summary()
+    assert summary["phases"]["scan"]["ms"] >= 20
+    assert summary["phases"]["frames"]["count"] == 1
+    assert summary["phases"]["scan"]["ms"] <= summary["total_ms"] < 250
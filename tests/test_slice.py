@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# 拆分 → 编辑 → 合并的无损往返：显式网格 (去掉末尾空格子) 与去重模式的 .frames.json 两条路径
+import os
+
+import pytest
+from PIL import Image
+
+from sprite_sheet_core import create_sprite_sheet, scan_image_files
+from sprite_sheet_slice import slice_sprite_sheet
+
+FRAME_SIZE = (12, 10)
+
+
+def _frame(seed):
+    img = Image.new("RGBA", FRAME_SIZE, (seed * 23 % 256, seed * 57 % 256, seed * 91 % 256, 255))
+    img.putpixel((seed % FRAME_SIZE[0], seed % FRAME_SIZE[1]), (255, 255, 255, 128))
+    return img
+
+
+def _merge(frame_dir, output_path, columns, rows, dedupe=False):
+    messages = []
+    success = create_sprite_sheet(frame_dir, columns, rows, output_path, messages.append,
+                                  FRAME_SIZE[0], FRAME_SIZE[1], "RGBA", scan_image_files(frame_dir), False,
+                                  dedupe=dedupe)
+    assert success, messages
+
+
+def _slice(sheet_path, output_dir, **grid):
+    messages = []
+    assert slice_sprite_sheet(sheet_path, output_dir, messages.append, workers=4, **grid), messages
+    return messages
+
+
+def _pixels(path):
+    with Image.open(path) as img:
+        return img.convert("RGBA").tobytes()
+
+
+@pytest.fixture
+def frame_dir(tmp_path):
+    frame_dir = str(tmp_path / "frames")
+    os.makedirs(frame_dir)
+    for i in range(10):
+        _frame(i).save(os.path.join(frame_dir, f"walk_{i}.png"))
+    return frame_dir
+
+
+def test_grid_slice_edit_merge_round_trip(frame_dir, tmp_path):
+    sheet = str(tmp_path / "walk_spritesheet.png")
+    _merge(frame_dir, sheet, 4, 3)
+
+    sliced_dir = str(tmp_path / "sliced")
+    messages = _slice(sheet, sliced_dir, columns=4, rows=3, drop_empty_tail=True)
+    assert any("去掉末尾 2 个空格子" in m for m in messages)
+    sliced = scan_image_files(sliced_dir)
+    assert sliced == [f"walk_{i:04d}.png" for i in range(10)]
+    for i, name in enumerate(sliced):
+        assert _pixels(os.path.join(sliced_dir, name)) == _frame(i).tobytes()
+
+    # 不修改时重新合并与原序列图完全一致
+    remerged = str(tmp_path / "remerged.png")
+    _merge(sliced_dir, remerged, 4, 3)
+    assert _pixels(remerged) == _pixels(sheet)
+
+    # 修改一帧后重新合并：只有该格子变化
+    edited = _frame(99)
+    edited.save(os.path.join(sliced_dir, sliced[5]))
+    _merge(sliced_dir, remerged, 4, 3)
+    with Image.open(remerged) as result, Image.open(sheet) as original:
+        box = (1 * FRAME_SIZE[0], 1 * FRAME_SIZE[1], 2 * FRAME_SIZE[0], 2 * FRAME_SIZE[1])
+        assert result.crop(box).tobytes() == edited.tobytes()
+        result.paste(original.crop(box), box[:2])
+        assert result.tobytes() == original.tobytes()
+
+
+def test_dedupe_frame_map_restores_original_names(frame_dir, tmp_path):
+    # 加入重复帧：walk_10 与 walk_2 相同，walk_11 与 walk_7 相同
+    _frame(2).save(os.path.join(frame_dir, "walk_10.png"))
+    _frame(7).save(os.path.join(frame_dir, "walk_11.png"))
+    sheet = str(tmp_path / "walk_spritesheet.png")
+    _merge(frame_dir, sheet, 4, 3, dedupe=True)
+    assert os.path.isfile(str(tmp_path / "walk_spritesheet.frames.json"))
+
+    restored_dir = str(tmp_path / "restored")
+    messages = _slice(sheet, restored_dir)
+    assert any("使用帧映射文件" in m for m in messages)
+    originals = scan_image_files(frame_dir)
+    assert scan_image_files(restored_dir) == originals
+    for name in originals:
+        assert _pixels(os.path.join(restored_dir, name)) == _pixels(os.path.join(frame_dir, name))
+
+    # 还原的目录与原目录合并出的序列图完全一致
+    reference = str(tmp_path / "reference.png")
+    remerged = str(tmp_path / "remerged.png")
+    _merge(frame_dir, reference, 4, 3)
+    _merge(restored_dir, remerged, 4, 3)
+    assert _pixels(remerged) == _pixels(reference)
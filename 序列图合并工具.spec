@@ -1,4 +1,18 @@
 # -*- mode: python ; coding: utf-8 -*-
+import pkgutil
+
+import PIL
+
+# 只打包读写 PNG/JPEG/BMP/GIF/TIFF/WebP 所需的 Pillow 插件 (PPM 由 Image.preinit 预载，MPO 为 JPEG 的变体)，
+# 其余格式插件，以及界面集成、字体、绘图等用不到的模块都不打包，
+# 减小单目录程序的体积和冷启动时需要加载的文件
+KEEP_PIL_PLUGINS = {'Png', 'Jpeg', 'Mpo', 'Bmp', 'Gif', 'Tiff', 'WebP', 'Ppm'}
+PIL_EXCLUDES = [f'PIL.{module.name}' for module in pkgutil.iter_modules(PIL.__path__)
+                if module.name.endswith('ImagePlugin') and module.name[:-len('ImagePlugin')] not in KEEP_PIL_PLUGINS]
+PIL_EXCLUDES += ['PIL.ImageTk', 'PIL._imagingtk', 'PIL.ImageQt', 'PIL.ImageShow', 'PIL.ImageGrab',
+                 'PIL.ImageFont', 'PIL._imagingft', 'PIL.FontFile', 'PIL.BdfFontFile', 'PIL.PcfFontFile',
+                 'PIL.ImageDraw', 'PIL.ImageDraw2', 'PIL.ImageText',
+                 'PIL.ImageMorph', 'PIL._imagingmorph', 'PIL._avif']
 
 
 a = Analysis(
@@ -10,7 +24,7 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=PIL_EXCLUDES,
     noarchive=False,
     optimize=0,
 )